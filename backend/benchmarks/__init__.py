@@ -0,0 +1,6 @@
+"""
+End-to-end benchmarks of the backend against in-process Pinecone and Groq fakes.
+
+    python -m benchmarks.run --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.compare old.json new.json
+"""
@@ -0,0 +1,58 @@
+"""
+Compare two benchmark result files metric by metric.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Numeric results are flattened to dotted paths (list entries are keyed by their
+concurrency, words or files value) and printed with their relative change.
+Changes beyond --threshold percent are flagged; latency and seconds regress
+when they grow, rates when they shrink.
+"""
+import argparse
+import json
+from typing import Any, Dict
+
+_LIST_KEYS = ("concurrency", "words", "files")
+_HIGHER_IS_BETTER = ("_per_s", "throughput")
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            label = next((f"{key}={item[key]}" for key in _LIST_KEYS if isinstance(item, dict) and key in item), str(i))
+            flat.update(flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    print(f"baseline {baseline['meta']['commit']}  ->  candidate {candidate['meta']['commit']}")
+
+    old, new = flatten(baseline["results"]), flatten(candidate["results"])
+    for path in sorted(set(old) & set(new)):
+        before, after = old[path], new[path]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if abs(change) >= args.threshold and ".calls." not in path:
+            better = (change > 0) == any(marker in path for marker in _HIGHER_IS_BETTER)
+            flag = "  improved" if better else "  REGRESSED"
+        print(f"{path:60s} {before:12.2f} {after:12.2f} {change:+8.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    main()
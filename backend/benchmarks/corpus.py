@@ -0,0 +1,62 @@
+"""Synthetic documents for benchmarks, deterministic for a given seed."""
+import random
+from typing import List
+
+_WORDS = (
+    "agreement party parties shall term termination notice payment invoice fee liability indemnify "
+    "confidential information obligation clause section schedule effective date governing law court "
+    "dispute arbitration warranty breach remedy damages license intellectual property employee "
+    "contractor services deliverables acceptance renewal assignment subcontract insurance audit "
+    "records compliance regulation data processing security incident force majeure waiver notice"
+).split()
+
+
+_PDF_DATE = "D:20240101000000Z"
+
+
+def paragraph(rng: random.Random, sentences: int = 5) -> str:
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(12, 24))]
+        out.append(f"Clause {rng.randint(1, 20)}.{rng.randint(1, 9)} " + " ".join(words) + ".")
+    return " ".join(out)
+
+
+def document_text(words: int, seed: int = 0) -> str:
+    """Plain text of roughly `words` words in paragraphs."""
+    rng = random.Random(seed)
+    paragraphs, count = [], 0
+    while count < words:
+        text = paragraph(rng)
+        paragraphs.append(text)
+        count += len(text.split())
+    return "\n\n".join(paragraphs)
+
+
+def pdf_bytes(pages: int, seed: int = 0, paragraphs_per_page: int = 4) -> bytes:
+    """
+    A text PDF of `pages` pages. Creation dates and the document ID are pinned,
+    so the same seed yields the same bytes (and content hash) on every call.
+    """
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = "\n\n".join(paragraph(rng) for _ in range(paragraphs_per_page))
+        page.insert_textbox(page.rect + (50, 50, -50, -50), text, fontsize=8)
+    doc.set_metadata({"creationDate": _PDF_DATE, "modDate": _PDF_DATE, "producer": "rag-bench"})
+    data = doc.tobytes(no_new_id=True)
+    doc.close()
+    return data
+
+
+def queries(n: int, seed: int = 0) -> List[str]:
+    """Distinct questions, so caches do not hide retrieval and LLM cost."""
+    rng = random.Random(seed)
+    return [
+        f"What does clause {rng.randint(1, 20)}.{rng.randint(1, 9)} say about "
+        f"{rng.choice(_WORDS)} and {rng.choice(_WORDS)} (#{i})?"
+        for i in range(n)
+    ]
@@ -0,0 +1,259 @@
+"""
+In-process stand-ins for Pinecone, Groq and the embedding model.
+
+`install()` patches the SDK classes before the application is imported, so the
+real code paths (clients, retries, thread pools, async routes) run unchanged
+against fakes with configurable latency and no network access.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+@dataclass
+class Latency:
+    """Latency of one call: `base_ms` plus uniform jitter of up to `jitter_ms`."""
+    base_ms: float = 0.0
+    jitter_ms: float = 0.0
+
+    def sample(self) -> float:
+        return (self.base_ms + random.uniform(0, self.jitter_ms)) / 1000.0
+
+
+@dataclass
+class FakeConfig:
+    pinecone_upsert: Latency = field(default_factory=lambda: Latency(40, 20))
+    pinecone_query: Latency = field(default_factory=lambda: Latency(30, 15))
+    groq_first_token: Latency = field(default_factory=lambda: Latency(250, 100))
+    # Generation time per output token and tokens produced per completion
+    groq_token_ms: float = 2.0
+    groq_output_tokens: int = 200
+    # When set, a hash-based embedder replaces the real model
+    fake_embedder: bool = True
+    embedding_dimension: int = 768
+    embedding_ms_per_text: float = 0.0
+
+
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: Dict[str, int] = {}
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + n
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.values)
+
+    def reset(self):
+        with self._lock:
+            self.values.clear()
+
+
+counters = Counters()
+
+
+class FakePineconeIndex:
+    """Brute-force cosine index per namespace; calls sleep for the configured latency."""
+
+    def __init__(self, config: FakeConfig):
+        self._config = config
+        self._lock = threading.Lock()
+        self._namespaces: Dict[Optional[str], Dict[str, Any]] = {}
+
+    def _namespace(self, namespace):
+        return self._namespaces.setdefault(namespace, {"ids": [], "rows": {}, "vectors": [], "metadata": []})
+
+    def upsert(self, vectors, namespace=None, **kwargs):
+        time.sleep(self._config.pinecone_upsert.sample())
+        counters.add("pinecone_upserts")
+        with self._lock:
+            ns = self._namespace(namespace)
+            for vector in vectors:
+                values = np.asarray(vector["values"], dtype=np.float32)
+                row = ns["rows"].get(vector["id"])
+                if row is None:
+                    ns["rows"][vector["id"]] = len(ns["ids"])
+                    ns["ids"].append(vector["id"])
+                    ns["vectors"].append(values)
+                    ns["metadata"].append(vector.get("metadata") or {})
+                else:
+                    ns["vectors"][row] = values
+                    ns["metadata"][row] = vector.get("metadata") or {}
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k=5, namespace=None, include_metadata=True, **kwargs):
+        time.sleep(self._config.pinecone_query.sample())
+        counters.add("pinecone_queries")
+        with self._lock:
+            ns = self._namespace(namespace)
+            ids = [i for i in ns["ids"] if i is not None]
+            if not ids:
+                return {"matches": []}
+            live = [row for row, i in enumerate(ns["ids"]) if i is not None]
+            matrix = np.stack([ns["vectors"][row] for row in live])
+            scores = matrix @ np.asarray(vector, dtype=np.float32)
+            best = np.argsort(-scores)[:top_k]
+            return {"matches": [
+                {
+                    "id": ns["ids"][live[i]],
+                    "score": float(scores[i]),
+                    "metadata": ns["metadata"][live[i]] if include_metadata else {},
+                }
+                for i in best
+            ]}
+
+    def delete(self, ids=None, namespace=None, **kwargs):
+        time.sleep(self._config.pinecone_upsert.sample())
+        with self._lock:
+            ns = self._namespace(namespace)
+            for vector_id in ids or ():
+                row = ns["rows"].pop(vector_id, None)
+                if row is not None:
+                    ns["ids"][row] = None
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            return {"namespaces": {
+                namespace: {"vector_count": len(ns["rows"])}
+                for namespace, ns in self._namespaces.items() if ns["rows"]
+            }}
+
+    def vector_count(self, namespace=None) -> int:
+        with self._lock:
+            return len(self._namespace(namespace)["rows"])
+
+
+class _IndexList:
+    def __init__(self, names):
+        self._names = names
+
+    def names(self):
+        return list(self._names)
+
+
+def _completion(text: str):
+    choice = types.SimpleNamespace(
+        message=types.SimpleNamespace(content=text),
+        delta=types.SimpleNamespace(content=text),
+    )
+    return types.SimpleNamespace(choices=[choice], usage=None)
+
+
+def _fake_answer(config: FakeConfig) -> List[str]:
+    return [f"tok{i} " for i in range(config.groq_output_tokens)]
+
+
+def _output_tokens(config: FakeConfig, max_tokens: Optional[int]) -> int:
+    return min(config.groq_output_tokens, max_tokens or config.groq_output_tokens)
+
+
+def _make_groq(config: FakeConfig):
+    class _Completions:
+        def create(self, messages, stream=False, max_tokens=None, **kwargs):
+            counters.add("groq_calls")
+            tokens = _fake_answer(config)[:_output_tokens(config, max_tokens)]
+            time.sleep(config.groq_first_token.sample())
+            if stream:
+                def chunks():
+                    for token in tokens:
+                        time.sleep(config.groq_token_ms / 1000.0)
+                        yield _completion(token)
+                return chunks()
+            time.sleep(len(tokens) * config.groq_token_ms / 1000.0)
+            return _completion("".join(tokens))
+
+    class _AsyncCompletions:
+        async def create(self, messages, stream=False, max_tokens=None, **kwargs):
+            counters.add("groq_calls")
+            tokens = _fake_answer(config)[:_output_tokens(config, max_tokens)]
+            await asyncio.sleep(config.groq_first_token.sample())
+            if stream:
+                async def chunks():
+                    for token in tokens:
+                        await asyncio.sleep(config.groq_token_ms / 1000.0)
+                        yield _completion(token)
+                return chunks()
+            await asyncio.sleep(len(tokens) * config.groq_token_ms / 1000.0)
+            return _completion("".join(tokens))
+
+    class FakeGroq:
+        def __init__(self, *args, **kwargs):
+            self.chat = types.SimpleNamespace(completions=_Completions())
+
+        def close(self):
+            pass
+
+    class FakeAsyncGroq:
+        def __init__(self, *args, **kwargs):
+            self.chat = types.SimpleNamespace(completions=_AsyncCompletions())
+
+        async def close(self):
+            pass
+
+    return FakeGroq, FakeAsyncGroq
+
+
+class HashEmbeddingBackend:
+    """Deterministic unit vectors derived from the text hash; optional per-text cost."""
+    name = "fake"
+
+    def __init__(self, config: FakeConfig):
+        self._config = config
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self._config.embedding_dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        counters.add("embedded_texts", len(texts))
+        if self._config.embedding_ms_per_text:
+            time.sleep(len(texts) * self._config.embedding_ms_per_text / 1000.0)
+        if not texts:
+            return np.zeros((0, self._config.embedding_dimension), dtype=np.float32)
+        vectors = np.stack([self._vector(text) for text in texts])
+        return vectors[0] if single else vectors
+
+
+def install(config: FakeConfig) -> FakePineconeIndex:
+    """
+    Patch the Pinecone and Groq SDKs (and optionally the embedding backend).
+    Must run before any `src` module is imported. Returns the shared fake index.
+    """
+    import groq
+    import pinecone
+
+    index = FakePineconeIndex(config)
+
+    class FakePinecone:
+        def __init__(self, *args, **kwargs):
+            self.openapi_config = types.SimpleNamespace(connection_pool_maxsize=None)
+
+        def list_indexes(self):
+            return _IndexList(["benchmark"])
+
+        def create_index(self, *args, **kwargs):
+            pass
+
+        def Index(self, *args, **kwargs):
+            return index
+
+    pinecone.Pinecone = FakePinecone
+    groq.Groq, groq.AsyncGroq = _make_groq(config)
+
+    if config.fake_embedder:
+        from src.utils import embedding_backend
+
+        embedding_backend.get_embedding_backend = lambda *args, **kwargs: HashEmbeddingBackend(config)
+    return index
@@ -0,0 +1,262 @@
+"""
+Run the end-to-end benchmarks and write the results as JSON.
+
+    python -m benchmarks.run                       # all scenarios, fake embedder
+    python -m benchmarks.run --scenarios query --query-concurrency 1,8,32
+    python -m benchmarks.run --real-embeddings --output results.json
+
+Scenarios:
+- ingest:    pages/s, chunks/s and vectors/s through process_uploaded_files,
+             then the time to re-upload the unchanged files (all skipped)
+- query:     /query latency percentiles and throughput per concurrency level
+- summarize: /summarize wall time and LLM calls per document size
+
+All state directories (manifests, caches, indexes) live in a temporary folder,
+so runs never touch the working tree and always start cold.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks import corpus
+from benchmarks.fakes import FakeConfig, Latency, counters, install
+
+_STATE_DIRS = {
+    "INGEST_MANIFEST_DIR": "manifests",
+    "INGEST_JOBS_DIR": "jobs",
+    "BM25_INDEX_DIR": "bm25",
+    "OCR_CACHE_DIR": "ocr",
+    "LOCAL_VECTOR_STORE_DIR": "vectors",
+}
+_STATE_FILES = {
+    "EMBEDDING_CACHE_PATH": "embedding_cache/embeddings.sqlite3",
+    "SUMMARY_CACHE_PATH": "summary_cache/summaries.sqlite3",
+}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 2),
+        "p90_ms": round(pick(0.90) * 1000, 2),
+        "p99_ms": round(pick(0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_ingest(files: int, pages: int) -> Dict[str, Any]:
+    from src.db.upload import process_uploaded_files
+
+    uploads = [
+        types.SimpleNamespace(filename=f"bench_{i}.pdf", file=io.BytesIO(corpus.pdf_bytes(pages, seed=i)))
+        for i in range(files)
+    ]
+    counters.reset()
+    started = time.perf_counter()
+    result = process_uploaded_files(uploads)
+    seconds = time.perf_counter() - started
+    calls = counters.snapshot()
+
+    # Same bytes again: every file should be skipped as already indexed
+    for upload in uploads:
+        upload.file.seek(0)
+    counters.reset()
+    started = time.perf_counter()
+    reingest = process_uploaded_files(uploads)
+    reingest_seconds = time.perf_counter() - started
+
+    chunks = result["chunks_processed"]
+    vectors = result["vectors_stored"]
+    return {
+        "files": files,
+        "pages": result["documents_processed"],
+        "chunks": chunks,
+        "vectors": vectors,
+        "seconds": round(seconds, 3),
+        "pages_per_s": round(result["documents_processed"] / seconds, 2),
+        "chunks_per_s": round(chunks / seconds, 2),
+        "vectors_per_s": round(vectors / seconds, 2),
+        "calls": calls,
+        "reingest": {
+            "seconds": round(reingest_seconds, 3),
+            "files_skipped": reingest["files_skipped"],
+            "vectors_stored": reingest["vectors_stored"],
+            "calls": counters.snapshot(),
+        },
+    }
+
+
+async def _query_level(client, questions: List[str], concurrency: int, path: str) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    not_found = 0
+
+    async def one(question: str):
+        nonlocal errors, not_found
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json={"query": question, "min_score": 0.0, "use_cache": False})
+            latencies.append(time.perf_counter() - started)
+            # /query answers with HTTP 200 and reports the outcome in the body
+            body = response.json() if response.status_code == 200 else {}
+            if body.get("statusCode") == 404:
+                not_found += 1
+            elif body.get("statusCode") != 200 or not body.get("success"):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(question) for question in questions))
+    wall = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "errors": errors,
+        "not_found": not_found,
+        "throughput_rps": round(len(questions) / wall, 2),
+        **_percentiles(latencies),
+    }
+
+
+def bench_query(levels: List[int], requests_per_level: int) -> List[Dict[str, Any]]:
+    import httpx
+    from main import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            results = []
+            for i, level in enumerate(levels):
+                questions = corpus.queries(requests_per_level, seed=1000 + i)
+                counters.reset()
+                result = await _query_level(client, questions, level, "/query")
+                result["calls"] = counters.snapshot()
+                results.append(result)
+            return results
+
+    return asyncio.run(run())
+
+
+def bench_summarize(sizes: List[int]) -> List[Dict[str, Any]]:
+    from fastapi.testclient import TestClient
+    from main import app
+
+    results = []
+    with TestClient(app) as client:
+        for words in sizes:
+            text = corpus.document_text(words, seed=words)
+            counters.reset()
+            started = time.perf_counter()
+            response = client.post("/summarize", data={"text": text, "style": "detailed"})
+            seconds = time.perf_counter() - started
+            results.append({
+                "words": words,
+                "seconds": round(seconds, 3),
+                "ok": response.status_code == 200 and "summary" in response.json(),
+                "calls": counters.snapshot(),
+            })
+    return results
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="ingest,query,summarize")
+    parser.add_argument("--output", help="JSON output path; printed to stdout when omitted")
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="use the configured embedding backend instead of the hash embedder")
+    parser.add_argument("--ingest-files", type=int, default=4)
+    parser.add_argument("--ingest-pages", type=int, default=50, help="pages per file")
+    parser.add_argument("--query-concurrency", type=_int_list, default=[1, 4, 16])
+    parser.add_argument("--query-requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--summary-words", type=_int_list, default=[1000, 10000, 50000])
+    parser.add_argument("--pinecone-query-ms", type=float, default=30)
+    parser.add_argument("--pinecone-upsert-ms", type=float, default=40)
+    parser.add_argument("--groq-first-token-ms", type=float, default=250)
+    parser.add_argument("--groq-token-ms", type=float, default=2.0)
+    parser.add_argument("--groq-output-tokens", type=int, default=200)
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+
+    config = FakeConfig(
+        pinecone_upsert=Latency(args.pinecone_upsert_ms, args.pinecone_upsert_ms / 2),
+        pinecone_query=Latency(args.pinecone_query_ms, args.pinecone_query_ms / 2),
+        groq_first_token=Latency(args.groq_first_token_ms, args.groq_first_token_ms / 2),
+        groq_token_ms=args.groq_token_ms,
+        groq_output_tokens=args.groq_output_tokens,
+        fake_embedder=not args.real_embeddings,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as state_dir:
+        os.environ.update({
+            "PINECONE_API_KEY": "benchmark",
+            "PINECONE_INDEX_NAME": "benchmark",
+            "PINECONE_NAMESPACE": "benchmark",
+            "GROQ_API_KEY": "benchmark",
+            "VECTOR_STORE_BACKEND": "pinecone",
+        })
+        for name, sub in {**_STATE_DIRS, **_STATE_FILES}.items():
+            os.environ[name] = str(Path(state_dir) / sub)
+
+        install(config)
+        results: Dict[str, Any] = {}
+        if "ingest" in scenarios:
+            results["ingest"] = bench_ingest(args.ingest_files, args.ingest_pages)
+        if "query" in scenarios:
+            if "ingest" not in scenarios:
+                bench_ingest(1, args.ingest_pages)
+            results["query"] = bench_query(args.query_concurrency, args.query_requests)
+        if "summarize" in scenarios:
+            results["summarize"] = bench_summarize(args.summary_words)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,86 @@
+import logging
+import time
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from src.config import settings
+from src.config.clients import close_clients
 from src.routes import router
+from src.services.job_service import job_service
+from src.services.warmup_service import warmup_service
+from src.core.metrics import HTTP_REQUEST_SECONDS, server_timing_header, start_request_timing
+from src.core.exceptions import UploadTooLargeException
 from fastapi.middleware.cors import CORSMiddleware
 
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# LOG_LEVEL applies to the application loggers; libraries stay at WARNING
+logging.getLogger("src").setLevel(settings.LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and clients in the background; /readyz reports when done
+    warmup_service.start()
+    # Resume ingestion jobs interrupted by a restart
+    job_service.recover()
+    yield
+    await close_clients()
+
+
 app = FastAPI(
     title="rag_chatbot",
     description="A RAG-based chatbot, utilizing Groq LLM for comprehensive legal analysis and responses.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 app.include_router(router)
+
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """
+    Add Server-Timing (per-stage durations) and X-Process-Time-Ms headers and
+    record the request latency. Streaming responses report the time until their
+    headers are sent.
+    """
+    timings = start_request_timing()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    response.headers["X-Process-Time-Ms"] = f"{elapsed * 1000:.1f}"
+    # Label by route template so path parameters do not multiply the series
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.labels(
+        request.method, getattr(route, "path", "unmatched"), str(response.status_code)
+    ).observe(elapsed)
+    return response
+
+
+@app.middleware("http")
+async def limit_request_size(request: Request, call_next):
+    """
+    Reject requests whose declared body exceeds UPLOAD_MAX_REQUEST_BYTES before
+    the multipart parser spools any of it; chunked bodies are bounded while copying.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_REQUEST_BYTES:
+        error = UploadTooLargeException(
+            f"Request body exceeds the {settings.UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024)} MiB limit"
+        )
+        return JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+    return await call_next(request)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allow all origins for development
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Process-Time-Ms"],
 )
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,175 @@
+"""
+Export the embedding model to ONNX with dynamic int8 quantization, and check
+the export against the PyTorch model.
+
+Usage (from the backend directory):
+    python scripts/onnx_embeddings.py export
+    python scripts/onnx_embeddings.py check [--texts-file chunks.txt] [--min-cosine 0.99]
+
+`export` writes model.onnx, model_int8.onnx and the tokenizer to
+ONNX_EMBEDDING_MODEL_DIR. `check` encodes the same texts with both backends,
+reports per-text cosine agreement and encoding throughput, records the result
+in parity.json next to the model, and exits non-zero when agreement is below
+--min-cosine. EMBEDDING_BACKEND=onnx only loads an export whose check passed.
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.utils.embedding_backend import (  # noqa: E402
+    ONNX_MODEL_FILE,
+    ONNX_PARITY_FILE,
+    OnnxEmbeddingBackend,
+    SentenceTransformerBackend,
+)
+from src.utils.hashing import sha256_file  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "The lessee shall pay rent on the first business day of each calendar month.",
+    "Either party may terminate this agreement with thirty (30) days written notice.",
+    "Clause 4.2.1 limits the supplier's aggregate liability to the fees paid in the preceding twelve months.",
+    "This agreement is governed by the laws of the State of Delaware.",
+    "Confidential information excludes information that is publicly available through no fault of the recipient.",
+    "The employee is entitled to twenty days of paid annual leave.",
+    "Force majeure events include natural disasters, war, and government action.",
+    "Invoices are payable within 45 days of receipt.",
+    "what are the termination conditions",
+    "who owns the intellectual property created under the contract",
+]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def export(model_name: str, out_dir: Path, opset: int):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # A new export has not been checked yet
+    (out_dir / ONNX_PARITY_FILE).unlink(missing_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = out_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    int8_path = out_dir / ONNX_MODEL_FILE
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    print(f"Exported {model_name}:")
+    for path in (fp32_path, int8_path):
+        print(f"  {path}  {path.stat().st_size / 1e6:.1f} MB")
+
+
+def _throughput(backend, texts, batch_size: int, rounds: int) -> float:
+    backend.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)  # warm-up
+    started = time.perf_counter()
+    for _ in range(rounds):
+        backend.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    return rounds * len(texts) / (time.perf_counter() - started)
+
+
+def check(texts, min_cosine: float, batch_size: int, rounds: int, model_dir: Path) -> bool:
+    baseline_rss = _peak_rss_mb()
+    onnx_backend = OnnxEmbeddingBackend(model_dir=str(model_dir), require_parity=False)
+    onnx_rss = _peak_rss_mb()
+    torch_backend = SentenceTransformerBackend()
+    torch_rss = _peak_rss_mb()
+
+    reference = torch_backend.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    candidate = onnx_backend.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    cosines = np.sum(reference * candidate, axis=1)
+    print(f"Cosine agreement over {len(texts)} texts: "
+          f"min {cosines.min():.4f}, mean {cosines.mean():.4f}, p5 {np.percentile(cosines, 5):.4f}")
+
+    # Retrieval parity: does each text's nearest neighbour stay the same?
+    same_neighbour = np.mean(
+        np.argsort(-(reference @ reference.T), axis=1)[:, 1] == np.argsort(-(candidate @ candidate.T), axis=1)[:, 1]
+    ) if len(texts) > 2 else 1.0
+    print(f"Nearest-neighbour agreement: {same_neighbour:.1%}")
+
+    torch_rate = _throughput(torch_backend, texts, batch_size, rounds)
+    onnx_rate = _throughput(onnx_backend, texts, batch_size, rounds)
+    print(f"Throughput (batch {batch_size}): torch {torch_rate:.1f} texts/s, "
+          f"onnx int8 {onnx_rate:.1f} texts/s, speed-up x{onnx_rate / torch_rate:.2f}")
+    print(f"Peak RSS growth on load: onnx int8 {onnx_rss - baseline_rss:.0f} MB, "
+          f"torch {torch_rss - onnx_rss:.0f} MB")
+
+    passed = bool(cosines.min() >= min_cosine)
+    record = {
+        "model": settings.EMBEDDING_MODEL_NAME,
+        "model_file": ONNX_MODEL_FILE,
+        "model_sha256": sha256_file(model_dir / ONNX_MODEL_FILE),
+        "texts": len(texts),
+        "min_cosine_threshold": min_cosine,
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "max_cosine_deviation": round(float(1.0 - cosines.min()), 6),
+        "mean_cosine_deviation": round(float(1.0 - cosines.mean()), 6),
+        "nearest_neighbour_agreement": round(float(same_neighbour), 4),
+        "torch_texts_per_second": round(torch_rate, 1),
+        "onnx_texts_per_second": round(onnx_rate, 1),
+        "passed": passed,
+        "checked_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    (model_dir / ONNX_PARITY_FILE).write_text(json.dumps(record, indent=2) + "\n", encoding="utf-8")
+    print("PASS" if passed else f"FAIL: cosine below {min_cosine}")
+    print(f"Recorded in {model_dir / ONNX_PARITY_FILE}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="export and quantize the embedding model")
+    export_parser.add_argument("--model", default=settings.EMBEDDING_MODEL_NAME)
+    export_parser.add_argument("--out-dir", default=settings.ONNX_EMBEDDING_MODEL_DIR)
+    export_parser.add_argument("--opset", type=int, default=17)
+
+    check_parser = sub.add_parser("check", help="compare the ONNX export with the PyTorch model")
+    check_parser.add_argument("--model-dir", default=settings.ONNX_EMBEDDING_MODEL_DIR)
+    check_parser.add_argument("--texts-file", help="one text per line; defaults to built-in samples")
+    check_parser.add_argument("--min-cosine", type=float, default=0.99)
+    check_parser.add_argument("--batch-size", type=int, default=32)
+    check_parser.add_argument("--rounds", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.model, Path(args.out_dir), args.opset)
+        return
+    texts = SAMPLE_TEXTS
+    if args.texts_file:
+        texts = [line.strip() for line in open(args.texts_file, encoding="utf-8") if line.strip()]
+    passed = check(texts, args.min_cosine, args.batch_size, args.rounds, Path(args.model_dir))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Process-wide registry of pooled API clients.
+
+Every service gets its Pinecone and Groq clients from here, so a process
+holds one keep-alive connection pool per remote service. Hot paths reuse
+open connections instead of building clients and repeating TLS handshakes.
+Clients are created on first use; `close_clients` releases them at shutdown.
+"""
+from functools import lru_cache
+import httpx
+from groq import AsyncGroq, DefaultAsyncHttpxClient, DefaultHttpxClient, Groq
+from pinecone import Pinecone
+from src.config import settings
+from src.core.exceptions import PineconeInitializationException
+
+
+def _groq_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_pinecone_client() -> Pinecone:
+    """Pinecone control-plane client; its connection settings are inherited by index clients."""
+    pc = Pinecone(settings.PINECONE_API_KEY)
+    # urllib3 keeps at most this many idle connections per host; concurrent
+    # upserts and queries beyond it would open and discard extra connections
+    pc.openapi_config.connection_pool_maxsize = settings.PINECONE_POOL_MAXSIZE
+    return pc
+
+
+@lru_cache(maxsize=1)
+def get_pinecone_index():
+    """Data-plane connection to PINECONE_INDEX_NAME, shared by all threads."""
+    if settings.PINECONE_INDEX_NAME is None:
+        raise PineconeInitializationException("PINECONE_INDEX_NAME is not configured")
+    return get_pinecone_client().Index(settings.PINECONE_INDEX_NAME)
+
+
+@lru_cache(maxsize=1)
+def get_groq_client() -> Groq:
+    return Groq(
+        api_key=settings.GROQ_API_KEY,
+        http_client=DefaultHttpxClient(limits=_groq_limits()),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_groq_client() -> AsyncGroq:
+    return AsyncGroq(
+        api_key=settings.GROQ_API_KEY,
+        http_client=DefaultAsyncHttpxClient(limits=_groq_limits()),
+    )
+
+
+async def close_clients():
+    """
+    Close the Groq connection pools at shutdown. Pinecone's urllib3 pools
+    hold no background resources and close with the process.
+    """
+    if get_groq_client.cache_info().currsize:
+        get_groq_client().close()
+        get_groq_client.cache_clear()
+    if get_async_groq_client.cache_info().currsize:
+        await get_async_groq_client().close()
+        get_async_groq_client.cache_clear()
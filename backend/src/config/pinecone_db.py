@@ -1,11 +1,10 @@
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import ServerlessSpec
 from src.config import settings
+from src.config.clients import get_pinecone_client
 from src.core.exceptions import PineconeInitializationException
 
-pinecone_api_key = settings.PINECONE_API_KEY
 pinecone_index_name = settings.PINECONE_INDEX_NAME
 
-pc = Pinecone(pinecone_api_key)
 
 def pinecone_connection():
     """
@@ -13,19 +12,15 @@ def pinecone_connection():
     """
     if pinecone_index_name is None:
         raise PineconeInitializationException("PINECONE_INDEX_NAME is not configured")
-    
+
+    pc = get_pinecone_client()
     try:
         if pinecone_index_name not in pc.list_indexes().names():
             pc.create_index(
                 name=pinecone_index_name,
-                dimension=768,
+                dimension=settings.EMBEDDING_DIMENSION,
                 metric="cosine",
                 spec=ServerlessSpec(cloud="aws", region="us-east-1"),
             )
     except Exception as e:
         raise PineconeInitializationException(str(e))
-
-# Create index connection for global use
-if pinecone_index_name is None:
-    raise PineconeInitializationException("PINECONE_INDEX_NAME is not configured")
-index = pc.Index(pinecone_index_name)
\ No newline at end of file
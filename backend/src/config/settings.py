@@ -7,7 +7,118 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME")
 PINECONE_NAMESPACE = os.getenv("PINECONE_NAMESPACE")
 PINECONE_BATCH_SIZE = os.getenv("PINECONE_BATCH_SIZE")
+# Concurrent upserts: batches in flight, request payload cap (Pinecone allows 2 MB), retries
+UPSERT_MAX_CONCURRENCY = int(os.getenv("UPSERT_MAX_CONCURRENCY", "4"))
+UPSERT_MAX_REQUEST_BYTES = int(os.getenv("UPSERT_MAX_REQUEST_BYTES", str(1_800_000)))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "4"))
+UPSERT_BACKOFF_SECONDS = float(os.getenv("UPSERT_BACKOFF_SECONDS", "0.5"))
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-POPPLER_PATH = os.getenv("POPPLER_PATH")
+# Shared API client pools: keep-alive connections to Pinecone and Groq reused across requests
+PINECONE_POOL_MAXSIZE = int(os.getenv("PINECONE_POOL_MAXSIZE", "16"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "32"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "16"))
+GROQ_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", "60"))
+
+# Vector store backend: "pinecone" or "local" (memory-mapped NumPy store on disk)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+LOCAL_VECTOR_STORE_DIR = os.getenv("LOCAL_VECTOR_STORE_DIR", ".vector_store")
+# Compact a local namespace once this fraction of its rows are deleted (tombstoned)
+LOCAL_VECTOR_STORE_COMPACT_RATIO = float(os.getenv("LOCAL_VECTOR_STORE_COMPACT_RATIO", "0.3"))
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "768"))
+
+# Embedding model and backend: "torch" (SentenceTransformer) or "onnx" (int8 ONNX Runtime export)
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "intfloat/e5-base-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_EMBEDDING_MODEL_DIR = os.getenv("ONNX_EMBEDDING_MODEL_DIR", ".onnx_models/e5-base-v2")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0")) or None
+# Persistent cache of chunk embeddings keyed by model and chunk-text hash
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".embedding_cache/embeddings.sqlite3")
+# Size limit of the stored vectors before LRU eviction (1 GiB holds ~350k 768-dim vectors)
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Where per-namespace manifests of already indexed files and chunk ids are kept
+INGEST_MANIFEST_DIR = os.getenv("INGEST_MANIFEST_DIR", ".ingest_manifests")
+# Background ingestion jobs: persisted state directory and max jobs running at once
+INGEST_JOBS_DIR = os.getenv("INGEST_JOBS_DIR", ".ingest_jobs")
+INGEST_MAX_CONCURRENT_JOBS = int(os.getenv("INGEST_MAX_CONCURRENT_JOBS", "1"))
+# Finished jobs kept for GET /jobs/<id>: max age and max count, oldest removed first
+INGEST_JOB_RETENTION_SECONDS = float(os.getenv("INGEST_JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+INGEST_JOB_MAX_FINISHED = int(os.getenv("INGEST_JOB_MAX_FINISHED", "1000"))
+# Upload limits: bytes per file and per request, copy chunk size, and the smaller
+# per-file limit of /summarize (whose input is read into memory)
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(500 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+SUMMARIZE_MAX_FILE_BYTES = int(os.getenv("SUMMARIZE_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+# Streaming ingestion: chunks per embedding batch and batches buffered between stages
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+# PDF text extraction process pool; large files are split into page ranges
+PDF_LOADER_WORKERS = int(os.getenv("PDF_LOADER_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "64"))
+# OCR of image-only pages: render DPI, tesseract processes per loader worker, result cache
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", ".ocr_cache")
+
+# Max threads running query embeddings off the event loop
+EMBEDDING_MAX_WORKERS = int(os.getenv("EMBEDDING_MAX_WORKERS", "2"))
+# Micro-batching window for concurrent query embeddings
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+
+# In-process cache of query embeddings and retrieval results
+QUERY_CACHE_MAX_SIZE = int(os.getenv("QUERY_CACHE_MAX_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+
+# Semantic answer cache: reuse an answer for near-duplicate questions over the same chunks
+ANSWER_CACHE_MAX_SIZE = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "512"))
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+# Batch queries (/query/batch): max questions per request, concurrent retrievals and Groq calls per batch
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "1000"))
+QUERY_BATCH_RETRIEVAL_CONCURRENCY = int(os.getenv("QUERY_BATCH_RETRIEVAL_CONCURRENCY", "16"))
+QUERY_BATCH_LLM_CONCURRENCY = int(os.getenv("QUERY_BATCH_LLM_CONCURRENCY", "8"))
+# Token budgeting: tokenizer used for counting, model context window and summarize chunk size.
+# The default is the tokenizer of the served model (Llama 3.1, 128k vocabulary); the
+# repository is gated, so it needs an HF_TOKEN with access (or an ungated copy of the
+# same tokenizer). Without it, counts fall back to a deliberately high per-character
+# estimate (see src/utils/token_budget.py) rather than to a different model's tokenizer.
+TOKENIZER_NAME = os.getenv("TOKENIZER_NAME", "meta-llama/Llama-3.1-8B-Instruct")
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "8192"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "2000"))
+
+# Hybrid retrieval (off by default): local BM25 index fused with dense search by reciprocal rank
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "false").lower() == "true"
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", ".bm25_index")
+# Candidates fetched from each retriever per requested result
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "4"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Fraction of distinct query terms a keyword-only match must contain
+BM25_MIN_TERM_MATCH = float(os.getenv("BM25_MIN_TERM_MATCH", "0.5"))
+# Min BM25 score, relative to the best score possible for the query (0-1), of a chunk
+# found only by the keyword search; the keyword-only counterpart of min_score.
+# A chunk holding each query term once at average length scores about 0.45.
+BM25_MIN_KEYWORD_SCORE = float(os.getenv("BM25_MIN_KEYWORD_SCORE", "0.3"))
+
+# Optional cross-encoder reranking: candidates retrieved per query, per-query latency budget, score cache
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_LATENCY_BUDGET_MS = float(os.getenv("RERANK_LATENCY_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+RERANK_CACHE_MAX_SIZE = int(os.getenv("RERANK_CACHE_MAX_SIZE", "8192"))
+
+# Summarization: max concurrent Groq calls in the map and reduce phases (shared by all requests)
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+# Persistent summary cache (SQLite) and its size limit before LRU eviction
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", ".summary_cache/summaries.sqlite3")
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Load the embedding model, reranker and API clients in the background at startup;
+# /readyz reports ready once done. When off, everything loads on first use.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Log level of the application loggers (DEBUG logs per-query retrieval and stage timings)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 LLAMA_LLM_MODEL: str = "llama-3.1-8b-instant"
\ No newline at end of file
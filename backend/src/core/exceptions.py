@@ -2,12 +2,14 @@ from fastapi import HTTPException
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
     HTTP_500_INTERNAL_SERVER_ERROR
 )
 
 STATUS_MESSAGES = {
     HTTP_400_BAD_REQUEST: "Bad Request",
     HTTP_404_NOT_FOUND: "Not Found",
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE: "Payload Too Large",
     HTTP_500_INTERNAL_SERVER_ERROR: "Internal Server Error"
 }
 
@@ -36,6 +38,36 @@ class DocumentFolderNotFoundException(BaseAPIException):
         )
 
 
+class JobNotFoundException(BaseAPIException):
+    """Raised when an ingestion job id is unknown."""
+    def __init__(self, job_id: str):
+        super().__init__(
+            HTTP_404_NOT_FOUND,
+            STATUS_MESSAGES[HTTP_404_NOT_FOUND],
+            f"Ingestion job not found: {job_id}"
+        )
+
+
+class QueryBatchTooLargeException(BaseAPIException):
+    """Raised when a /query/batch request holds more questions than allowed."""
+    def __init__(self, size: int, max_size: int):
+        super().__init__(
+            HTTP_400_BAD_REQUEST,
+            STATUS_MESSAGES[HTTP_400_BAD_REQUEST],
+            f"Batch of {size} queries exceeds the maximum of {max_size}"
+        )
+
+
+class UploadTooLargeException(BaseAPIException):
+    """Raised when an uploaded file or request exceeds its size limit."""
+    def __init__(self, message="Upload exceeds the maximum allowed size"):
+        super().__init__(
+            HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            STATUS_MESSAGES[HTTP_413_REQUEST_ENTITY_TOO_LARGE],
+            message
+        )
+
+
 class DocumentProcessingException(BaseAPIException):
     """Raised when there is an error in document processing."""
     def __init__(self, message="Error occurred while processing the document"):
@@ -96,6 +128,26 @@ class PineconeUpsertException(BaseAPIException):
         )
 
 
+class PineconeDeleteException(BaseAPIException):
+    """Raised when deleting vectors from Pinecone fails."""
+    def __init__(self, message="Pinecone delete failed"):
+        super().__init__(
+            HTTP_500_INTERNAL_SERVER_ERROR,
+            STATUS_MESSAGES[HTTP_500_INTERNAL_SERVER_ERROR],
+            message
+        )
+
+
+class VectorStoreException(BaseAPIException):
+    """Raised when the vector store is misconfigured or its data is unusable."""
+    def __init__(self, message="Vector store error"):
+        super().__init__(
+            HTTP_500_INTERNAL_SERVER_ERROR,
+            STATUS_MESSAGES[HTTP_500_INTERNAL_SERVER_ERROR],
+            message
+        )
+
+
 class LLMServiceAPIException(BaseAPIException):
     """Raised when there is an API error with the LLM service."""
     def __init__(self, message="LLM service API error"):
@@ -0,0 +1,80 @@
+"""
+Prometheus metrics and per-stage timing spans.
+
+Wrap a pipeline stage in `with stage("vector_query"):` to record its duration
+in `rag_stage_duration_seconds` (and count failures), and to add it to the
+Server-Timing header of the current HTTP request. Everything is exported
+in Prometheus text format by GET /metrics.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_duration_seconds", "Duration of pipeline stages", ["stage"], buckets=_LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("rag_stage_errors_total", "Pipeline stages that raised", ["stage"])
+HTTP_REQUEST_SECONDS = Histogram(
+    "rag_http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+PAGES = Counter("rag_pages_total", "PDF pages extracted", ["source"])
+CHUNKS = Counter("rag_chunks_total", "Chunks by ingestion operation", ["operation"])
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens", ["kind"])
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups", ["cache", "result"])
+ERRORS = Counter("rag_errors_total", "Failed queries, summaries and ingestion jobs", ["operation"])
+
+# Stage durations of the HTTP request being handled, for the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def observe_stage(name: str, seconds: float):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)."""
+    STAGE_SECONDS.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as pipeline stage `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_stage(name, elapsed)
+        logger.debug("stage %s took %.1f ms", name, elapsed * 1000)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def start_request_timing() -> Dict[str, float]:
+    """Start collecting stage timings for the current request; returns the live dict."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float], total_seconds: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in Prometheus text format, with their content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -26,6 +26,16 @@ Excerpt:
 Summary:
 """
 
+INTERMEDIATE_SUMMARY_COMBINE_PROMPT_TEMPLATE = """
+Below are summaries of sequential sections of a document. Merge them into one concise summary of these sections,
+preserving all key facts, figures, and arguments in their original order. Be concise.
+
+Section Summaries:
+{summaries}
+
+Summary:
+"""
+
 REDUCE_SUMMARY_COMBINE_PROMPT_TEMPLATE = """
 You are an expert summarization assistant.
 Below are summaries of sequential sections of a document. Combine them into one coherent {style}.
@@ -0,0 +1,212 @@
+import math
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+from src.config import settings
+
+# Words, keeping dotted/hyphenated identifiers such as clause numbers ("4.2.1", "s-12") whole
+_TOKEN_RE = re.compile(r"\w+(?:[.\-/]\w+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what when where which who will with does do did how any all can".split()
+)
+# SQLite limit on bound parameters per statement, with headroom
+_MAX_SQL_PARAMS = 900
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of `text` without stopwords."""
+    return [term for term in _TOKEN_RE.findall(text.casefold()) if term not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Sparse keyword index of stored chunks (Okapi BM25), one SQLite file per namespace.
+
+    Postings are kept in a WITHOUT ROWID table clustered by term, so a query
+    reads only the postings of its own terms; chunk text is stored zlib-compressed
+    for chunks that only the keyword search finds. Chunk ids are content
+    hashes, so re-adding an id is a no-op.
+    """
+
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "doc INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, length INTEGER NOT NULL, "
+            "filename TEXT, page_number INTEGER, file_path TEXT, text BLOB NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, doc INTEGER NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, doc)) WITHOUT ROWID"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.db.execute("INSERT OR IGNORE INTO stats VALUES ('docs', 0), ('total_length', 0)")
+        self.db.commit()
+
+    def _stats(self):
+        rows = dict(self.db.execute("SELECT key, value FROM stats").fetchall())
+        return rows["docs"], rows["total_length"]
+
+    def _update_stats(self, docs: int, total_length: int):
+        self.db.execute("UPDATE stats SET value = value + ? WHERE key = 'docs'", (docs,))
+        self.db.execute("UPDATE stats SET value = value + ? WHERE key = 'total_length'", (total_length,))
+
+    def _known(self, ids: List[str]) -> Dict[str, int]:
+        known = {}
+        for i in range(0, len(ids), _MAX_SQL_PARAMS):
+            part = ids[i:i + _MAX_SQL_PARAMS]
+            placeholders = ",".join("?" * len(part))
+            known.update(self.db.execute(f"SELECT id, doc FROM docs WHERE id IN ({placeholders})", part).fetchall())
+        return known
+
+    def missing(self, ids: Iterable[str]) -> Set[str]:
+        """Ids that are not in the index."""
+        ids = list(ids)
+        with self._lock:
+            return set(ids) - set(self._known(ids))
+
+    def add(self, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Index chunks given as {'id', 'metadata': {'text', 'filename', ...}} (vector
+        store records). Already indexed ids are skipped. Returns the number added.
+        """
+        with self._lock:
+            known = self._known([chunk["id"] for chunk in chunks])
+            added, total_length = 0, 0
+            for chunk in chunks:
+                if chunk["id"] in known:
+                    continue
+                metadata = chunk.get("metadata") or {}
+                text = metadata.get("text", "")
+                terms = Counter(tokenize(text))
+                length = sum(terms.values())
+                cursor = self.db.execute(
+                    "INSERT INTO docs (id, length, filename, page_number, file_path, text) VALUES (?, ?, ?, ?, ?, ?)",
+                    (chunk["id"], length, metadata.get("filename", ""), metadata.get("page_number", 0),
+                     metadata.get("file_path", ""), zlib.compress(text.encode("utf-8"))),
+                )
+                self.db.executemany(
+                    "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+                )
+                known[chunk["id"]] = cursor.lastrowid
+                added += 1
+                total_length += length
+            self._update_stats(added, total_length)
+            self.db.commit()
+            return added
+
+    def delete(self, ids: List[str]) -> int:
+        with self._lock:
+            known = self._known(list(ids))
+            if not known:
+                return 0
+            docs = list(known.values())
+            total_length = 0
+            for i in range(0, len(docs), _MAX_SQL_PARAMS):
+                part = docs[i:i + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                total_length += self.db.execute(
+                    f"SELECT COALESCE(SUM(length), 0) FROM docs WHERE doc IN ({placeholders})", part
+                ).fetchone()[0]
+                self.db.execute(f"DELETE FROM postings WHERE doc IN ({placeholders})", part)
+                self.db.execute(f"DELETE FROM docs WHERE doc IN ({placeholders})", part)
+            self._update_stats(-len(docs), -total_length)
+            self.db.commit()
+            return len(docs)
+
+    def search(self, query: str, top_k: int = 5, min_term_match: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Return up to `top_k` matches as {'id', 'score', 'normalized_score', 'metadata'},
+        best first. A chunk must contain at least `min_term_match` of the distinct
+        query terms. 'normalized_score' divides the score by the highest one the
+        query can reach (every term, saturated), so it is comparable across queries.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+        with self._lock:
+            n_docs, total_length = self._stats()
+            if n_docs <= 0:
+                return []
+            avg_length = total_length / n_docs
+            placeholders = ",".join("?" * len(terms))
+            rows = self.db.execute(
+                f"SELECT p.term, p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.doc = p.doc "
+                f"WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+            postings: Dict[str, List[tuple]] = {}
+            for term, doc, tf, length in rows:
+                postings.setdefault(term, []).append((doc, tf, length))
+            scores: Dict[int, float] = {}
+            matched: Counter = Counter()
+            # Terms missing from the index count at their (maximal) idf, so unmatched words lower the ceiling ratio
+            max_score = sum(
+                math.log(1 + (n_docs - len(postings.get(term, ())) + 0.5) / (len(postings.get(term, ())) + 0.5))
+                for term in terms
+            ) * (self.k1 + 1)
+            for term, entries in postings.items():
+                idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+                for doc, tf, length in entries:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / norm
+                    matched[doc] += 1
+
+            required = math.ceil(min_term_match * len(terms))
+            ranked = sorted(
+                (doc for doc in scores if matched[doc] >= required),
+                key=lambda doc: scores[doc],
+                reverse=True,
+            )[:top_k]
+            if not ranked:
+                return []
+            placeholders = ",".join("?" * len(ranked))
+            records = {
+                row[0]: row[1:]
+                for row in self.db.execute(
+                    f"SELECT doc, id, filename, page_number, file_path, text FROM docs WHERE doc IN ({placeholders})",
+                    ranked,
+                )
+            }
+
+        matches = []
+        for doc in ranked:
+            chunk_id, filename, page_number, file_path, text = records[doc]
+            matches.append({
+                "id": chunk_id,
+                "score": scores[doc],
+                "normalized_score": scores[doc] / max_score if max_score > 0 else 0.0,
+                "metadata": {
+                    "filename": filename,
+                    "page_number": page_number,
+                    "file_path": file_path,
+                    "text": zlib.decompress(text).decode("utf-8"),
+                },
+            })
+        return matches
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(namespace: Optional[str]) -> BM25Index:
+    """Shared BM25 index of a namespace under BM25_INDEX_DIR."""
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace) if namespace else "__default__"
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = BM25Index(Path(settings.BM25_INDEX_DIR) / f"{name}.sqlite3")
+        return _indexes[name]
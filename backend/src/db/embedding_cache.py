@@ -0,0 +1,155 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+import numpy as np
+from src.config import settings
+from src.utils.hashing import text_hash
+from src.core.metrics import CACHE_REQUESTS
+
+# SQLite limit on bound parameters per statement, with headroom
+_MAX_SQL_PARAMS = 900
+# Rows evicted per round once the cache is over its size limit
+_EVICTION_BATCH = 1024
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a chunk, so re-extracted copies share one entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings in SQLite, keyed by (model, text hash).
+
+    Vectors are stored as raw float32 blobs. The model key includes the
+    embedding backend, since int8 ONNX vectors differ slightly from PyTorch ones.
+    Entries are evicted least recently used first once the stored vectors
+    exceed `max_bytes`, so chunks of deleted or replaced documents age out.
+    """
+
+    def __init__(self, path: str = settings.EMBEDDING_CACHE_PATH,
+                 model_key: str = f"{settings.EMBEDDING_MODEL_NAME}:{settings.EMBEDDING_BACKEND}",
+                 max_bytes: int = settings.EMBEDDING_CACHE_MAX_BYTES):
+        self.model_key = model_key
+        self._max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(embeddings)")}
+        if "last_access" not in columns:
+            # Caches written before eviction existed start out equally old
+            self.db.execute("ALTER TABLE embeddings ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self.db.commit()
+        self._total_bytes = self.db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return text_hash(normalize_text(text))
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors of the given text keys; missing keys are absent."""
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for i in range(0, len(unique), _MAX_SQL_PARAMS):
+                part = unique[i:i + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                rows = self.db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_key, *part],
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                hit_keys = list(found)
+                for i in range(0, len(hit_keys), _MAX_SQL_PARAMS):
+                    part = hit_keys[i:i + _MAX_SQL_PARAMS]
+                    placeholders = ",".join("?" * len(part))
+                    self.db.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash IN ({placeholders})",
+                        [now, self.model_key, *part],
+                    )
+                self.db.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        CACHE_REQUESTS.labels("embedding", "hit").inc(hits)
+        CACHE_REQUESTS.labels("embedding", "miss").inc(len(keys) - hits)
+        return found
+
+    def set_many(self, items: Dict[str, Sequence[float]]):
+        now = time.time()
+        rows = [
+            (self.model_key, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            # Approximate (replaced rows are counted twice); made exact before evicting
+            self._total_bytes += sum(len(row[2]) for row in rows)
+            if self._total_bytes > self._max_bytes:
+                self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Drop least recently used vectors of any model until under the size limit. Caller holds the lock."""
+        self._total_bytes = self.db.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+        while self._total_bytes > self._max_bytes:
+            oldest = self.db.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT ?",
+                (_EVICTION_BATCH,),
+            ).fetchall()
+            if not oldest:
+                break
+            doomed = []
+            for model, key, size in oldest:
+                if self._total_bytes <= self._max_bytes:
+                    break
+                doomed.append((model, key))
+                self._total_bytes -= size
+            self.db.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", doomed)
+            self.evictions += len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_key,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes": self._total_bytes,
+                "max_bytes": self._max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Shared embedding cache, opened on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
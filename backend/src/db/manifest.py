@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from src.config import settings
+
+# Serializes read-modify-write cycles of manifests across concurrent uploads
+manifest_lock = threading.Lock()
+# Version 1 manifests were keyed by filename
+_VERSION = 2
+
+
+class IngestManifest:
+    """
+    Per-namespace record of what has already been indexed.
+
+    Entries are keyed by the SHA-256 of a file's content and hold the filename
+    it was uploaded as, the deterministic ids of the chunks stored for it and
+    whether all of them were stored. Uploads use it to skip content that is
+    already indexed and embed only new chunks. Different documents uploaded
+    under the same filename are kept side by side until the caller replaces
+    them (see `versions`).
+    """
+
+    def __init__(self, path: Path, files: Optional[Dict[str, dict]] = None):
+        self.path = path
+        self.files: Dict[str, dict] = files or {}
+
+    @classmethod
+    def load(cls, namespace: Optional[str]) -> "IngestManifest":
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace) if namespace else "__default__"
+        path = Path(settings.INGEST_MANIFEST_DIR) / f"{name}.json"
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        files = data.get("files", {})
+        if data.get("version") != _VERSION:
+            files = _from_filename_keys(files)
+        return cls(path, files)
+
+    def is_indexed(self, file_hash: str) -> bool:
+        """Whether this content was indexed with every chunk stored."""
+        entry = self.files.get(file_hash)
+        return bool(entry and entry.get("complete", True))
+
+    def chunk_ids(self, file_hash: str) -> Set[str]:
+        entry = self.files.get(file_hash)
+        return set(entry["chunk_ids"]) if entry else set()
+
+    def versions(self, filename: str) -> List[str]:
+        """Content hashes of everything indexed under `filename`."""
+        return [file_hash for file_hash, entry in self.files.items() if entry["filename"] == filename]
+
+    def update(self, file_hash: str, filename: str, chunk_ids: List[str], complete: bool = True):
+        """An incomplete entry (some chunks failed to store) is re-ingested by the next upload."""
+        self.files[file_hash] = {"filename": filename, "chunk_ids": sorted(chunk_ids), "complete": complete}
+
+    def remove(self, file_hash: str):
+        self.files.pop(file_hash, None)
+
+    def save(self):
+        """Write atomically so a crash never leaves a truncated manifest."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": _VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _from_filename_keys(files: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Convert a manifest keyed by filename (version 1) to content-hash keys.
+    Its chunk ids were derived from the filename and stay valid as recorded;
+    entries without a hash were partially stored and are marked incomplete.
+    """
+    converted = {}
+    for filename, entry in files.items():
+        file_hash = entry.get("file_hash") or f"incomplete:{filename}"
+        converted[file_hash] = {
+            "filename": filename,
+            "chunk_ids": entry.get("chunk_ids", []),
+            "complete": bool(entry.get("file_hash")),
+        }
+    return converted
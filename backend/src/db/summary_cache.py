@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from src.config import settings
+from src.utils.hashing import text_hash
+from src.core.metrics import record_cache
+
+# Rows evicted per round once the cache is over its size limit
+_EVICTION_BATCH = 32
+
+
+class SummaryCache:
+    """
+    Persistent SQLite cache of /summarize results, keyed by the hash of the extracted text.
+
+    Two kinds of entries are kept per document:
+    - sections: the style-independent summaries of a long document (map phase
+      plus intermediate combines), so a new style only re-runs the final combine;
+    - finals: the finished summary per style, so a repeat request makes no LLM call.
+    Entries are evicted least recently used first once their total size exceeds `max_bytes`.
+    The database file is created and opened on first use.
+    """
+
+    def __init__(self, path: str = settings.SUMMARY_CACHE_PATH,
+                 max_bytes: int = settings.SUMMARY_CACHE_MAX_BYTES):
+        self._path = path
+        self._max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = {"sections": 0, "finals": 0}
+        self.misses = {"sections": 0, "finals": 0}
+        self.evictions = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            with self._open_lock:
+                if self._db is None:
+                    Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+                    db = sqlite3.connect(self._path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS sections ("
+                        "doc_key TEXT PRIMARY KEY, summaries TEXT NOT NULL, size INTEGER NOT NULL, "
+                        "last_access REAL NOT NULL)"
+                    )
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS finals ("
+                        "doc_key TEXT NOT NULL, style TEXT NOT NULL, summary TEXT NOT NULL, "
+                        "size INTEGER NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (doc_key, style))"
+                    )
+                    db.commit()
+                    self._db = db
+        return self._db
+
+    @staticmethod
+    def key(text: str) -> str:
+        """
+        Cache key of a document. The model and chunk size are part of it, since
+        changing either changes the summaries.
+        """
+        return text_hash(f"{settings.LLAMA_LLM_MODEL}\x00{settings.SUMMARY_CHUNK_TOKENS}\x00{text}")
+
+    def get_sections(self, doc_key: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self.db.execute("SELECT summaries FROM sections WHERE doc_key = ?", (doc_key,)).fetchone()
+            if row is None:
+                self.misses["sections"] += 1
+                record_cache("summary_sections", False)
+                return None
+            self.db.execute("UPDATE sections SET last_access = ? WHERE doc_key = ?", (time.time(), doc_key))
+            self.db.commit()
+            self.hits["sections"] += 1
+            record_cache("summary_sections", True)
+            return json.loads(row[0])
+
+    def set_sections(self, doc_key: str, summaries: List[str]):
+        payload = json.dumps(summaries)
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO sections (doc_key, summaries, size, last_access) VALUES (?, ?, ?, ?)",
+                (doc_key, payload, len(payload.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self.db.commit()
+
+    def get_final(self, doc_key: str, style: str) -> Optional[str]:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT summary FROM finals WHERE doc_key = ? AND style = ?", (doc_key, style)
+            ).fetchone()
+            if row is None:
+                self.misses["finals"] += 1
+                record_cache("summary_finals", False)
+                return None
+            self.db.execute(
+                "UPDATE finals SET last_access = ? WHERE doc_key = ? AND style = ?", (time.time(), doc_key, style)
+            )
+            self.db.commit()
+            self.hits["finals"] += 1
+            record_cache("summary_finals", True)
+            return row[0]
+
+    def set_final(self, doc_key: str, style: str, summary: str):
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO finals (doc_key, style, summary, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (doc_key, style, summary, len(summary.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self.db.commit()
+
+    def _total_bytes(self) -> int:
+        return self.db.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM sections) + (SELECT COALESCE(SUM(size), 0) FROM finals)"
+        ).fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries of either kind until under the size limit. Caller holds the lock."""
+        total = self._total_bytes()
+        while total > self._max_bytes:
+            oldest = self.db.execute(
+                "SELECT 'sections', doc_key, '', size, last_access FROM sections "
+                "UNION ALL SELECT 'finals', doc_key, style, size, last_access FROM finals "
+                "ORDER BY last_access LIMIT ?",
+                (_EVICTION_BATCH,),
+            ).fetchall()
+            if not oldest:
+                break
+            for table, doc_key, style, size, _ in oldest:
+                if table == "sections":
+                    self.db.execute("DELETE FROM sections WHERE doc_key = ?", (doc_key,))
+                else:
+                    self.db.execute("DELETE FROM finals WHERE doc_key = ? AND style = ?", (doc_key, style))
+                total -= size
+                self.evictions += 1
+                if total <= self._max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = {
+                table: self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("sections", "finals")
+            }
+            stats = {
+                "bytes": self._total_bytes(),
+                "max_bytes": self._max_bytes,
+                "evictions": self.evictions,
+            }
+            for kind in ("sections", "finals"):
+                lookups = self.hits[kind] + self.misses[kind]
+                stats[kind] = {
+                    "entries": entries[kind],
+                    "hits": self.hits[kind],
+                    "misses": self.misses[kind],
+                    "hit_rate": round(self.hits[kind] / lookups, 4) if lookups else 0.0,
+                }
+            return stats
+
+
+summary_cache = SummaryCache()
@@ -1,46 +1,171 @@
+import logging
 import tempfile
 import os
-from backend.src.config.pinecone_db import pinecone_connection
-from src.utils.document_processor import RagPipeline
-from src.core.exceptions import DocumentProcessingException
+from pathlib import Path
+from typing import Callable, List, Optional
+from src.db.vector_store import get_vector_store
+from src.db.manifest import IngestManifest, manifest_lock
+from src.utils.document_processor import RagPipeline, pinecone_namespace
+from src.utils.hashing import sha256_file
+from src.core.exceptions import DocumentProcessingException, UploadTooLargeException
+from src.config import settings
+from src.utils.uploads import safe_filename, spool_to_file
 from src.schemas.response import DocumentProcessSuccessResponse
 
-def process_uploaded_files(uploaded_files) -> dict:
+logger = logging.getLogger(__name__)
+
+
+def save_uploaded_files(uploaded_files, folder_path: str) -> List[str]:
+    """
+    Copy uploaded files into `folder_path` in fixed-size chunks and return their filenames.
+    Raises UploadTooLargeException when a file exceeds UPLOAD_MAX_FILE_BYTES or
+    all files together exceed UPLOAD_MAX_REQUEST_BYTES.
+    """
+    filenames = []
+    total_bytes = 0
+    for uploaded_file in uploaded_files:
+        filename = safe_filename(uploaded_file.filename)
+        remaining = settings.UPLOAD_MAX_REQUEST_BYTES - total_bytes
+        file_path = Path(folder_path) / filename
+        try:
+            total_bytes += spool_to_file(
+                uploaded_file.file, file_path, max_bytes=min(settings.UPLOAD_MAX_FILE_BYTES, remaining)
+            )
+        except UploadTooLargeException:
+            if remaining < settings.UPLOAD_MAX_FILE_BYTES:
+                raise UploadTooLargeException(
+                    f"Upload exceeds the {settings.UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024)} MiB per-request limit"
+                )
+            raise
+        filenames.append(filename)
+    return filenames
+
+
+def ingest_folder(folder_path: str, progress: Optional[Callable[[str, int], None]] = None,
+                  replace: bool = False) -> dict:
+    """
+    Process the PDFs in a scratch folder through the complete pipeline:
+    1. Skip (and delete from the folder) files whose content is already indexed
+    2. Stream pages into content-addressed chunks
+    3. Embed only chunks that are not indexed yet, in batches
+    4. Store them in the configured vector database
+    5. With `replace`, delete the chunks of other documents indexed under the same filenames
+    Loading, embedding and upserting overlap (see RagPipeline.ingest_stream).
+
+    Args:
+        folder_path: Folder holding the uploaded files; files are removed when skipped
+        progress: Optional callback receiving (counter, increment) for
+            'pages_loaded', 'chunks' and 'vectors_stored'
+        replace: Treat each file as the new version of the document with its filename
+
+    Returns:
+        dict: Result containing success status and metadata
     """
-    Process uploaded files through the complete pipeline:
-    1. Load documents
-    2. Convert to embeddings
-    3. Store in Pinecone vector database
+    get_vector_store().initialize()
+
+    with manifest_lock:
+        manifest = IngestManifest.load(pinecone_namespace)
+
+    rag = RagPipeline()
+    uploaded = {}
+    file_hashes = {}
+    files_skipped = 0
+    for file_path in sorted(Path(folder_path).iterdir()):
+        if not file_path.is_file():
+            continue
+        file_hash = sha256_file(file_path)
+        uploaded[file_path.name] = file_hash
+        # Files indexed before the keyword index existed go through once to backfill it
+        if manifest.is_indexed(file_hash) and not (
+            rag.bm25_index is not None and rag.bm25_index.missing(manifest.chunk_ids(file_hash))
+        ):
+            logger.info("Skipping unchanged file: %s", file_path.name)
+            os.unlink(file_path)
+            files_skipped += 1
+            continue
+        file_hashes[file_path.name] = file_hash
+
+    # Files that yield no chunks (unreadable or empty) are left out of
+    # the manifest so they are retried
+    indexed_ids = set()
+    for file_hash in file_hashes.values():
+        indexed_ids |= manifest.chunk_ids(file_hash)
+    stats = {"pages": 0, "chunks": 0, "vectors_stored": 0, "chunk_ids": {}, "upsert": {}}
+    if file_hashes:
+        stats = rag.ingest_stream(
+            folder_path,
+            strict=False,
+            is_indexed=lambda chunk: chunk["id"] in indexed_ids,
+            progress=progress,
+            file_hashes=file_hashes,
+        )
+    current_ids = stats["chunk_ids"]
+    # Chunks whose upsert failed are left out of the manifest, and their files are
+    # recorded as incomplete so the next upload of the same bytes re-ingests them
+    failed_ids = set(stats["upsert"].get("failed_ids", ()))
+    incomplete = {filename for filename, ids in current_ids.items() if ids & failed_ids}
+    if failed_ids:
+        current_ids = {filename: ids - failed_ids for filename, ids in current_ids.items()}
+
+    # Earlier versions of replaced documents; chunks still used by other entries are kept
+    replaced = set()
+    if replace:
+        for filename, file_hash in uploaded.items():
+            replaced |= set(manifest.versions(filename))
+        replaced -= set(uploaded.values())
+    stale_ids = set()
+    for file_hash in replaced:
+        stale_ids |= manifest.chunk_ids(file_hash)
+    for file_hash in manifest.files.keys() - replaced:
+        stale_ids -= manifest.chunk_ids(file_hash)
+    for ids in current_ids.values():
+        stale_ids -= ids
+    vectors_deleted = rag.delete_embeddings(sorted(stale_ids))
+
+    # Re-read before writing so concurrent ingestions of other files are not lost
+    with manifest_lock:
+        manifest = IngestManifest.load(pinecone_namespace)
+        for filename, ids in current_ids.items():
+            manifest.update(file_hashes[filename], filename, list(ids), complete=filename not in incomplete)
+        for file_hash in replaced:
+            manifest.remove(file_hash)
+        manifest.save()
+
+    message = "Documents processed and stored successfully"
+    if failed_ids:
+        message = (
+            f"Documents processed; {len(failed_ids)} vectors failed to store. "
+            f"Upload {', '.join(sorted(incomplete))} again to retry them"
+        )
+
+    return DocumentProcessSuccessResponse(
+        success=not failed_ids,
+        message=message,
+        documents_processed=stats["pages"],
+        chunks_processed=stats["chunks"],
+        vectors_stored=stats["vectors_stored"],
+        files_skipped=files_skipped,
+        files_replaced=len(replaced),
+        vectors_deleted=vectors_deleted,
+        vectors_failed=len(failed_ids),
+    ).dict()
+
+
+def process_uploaded_files(uploaded_files, replace: bool = False) -> dict:
+    """
+    Process uploaded files synchronously through `ingest_folder`.
 
     Args:
         uploaded_files: List of uploaded file objects from Streamlit
+        replace: Replace documents previously uploaded under the same filenames
 
     Returns:
         dict: Result containing success status and metadata
     """
     try:
-        pinecone_connection()
-
         with tempfile.TemporaryDirectory() as tmpdirname:
-            file_paths = [r"C:\Users\vamsi\Downloads\Vamsi_B_Resume.pdf"]
-            for uploaded_file in uploaded_files:
-                file_path = os.path.join(tmpdirname, uploaded_file.filename)
-                with open(file_path, "wb") as f:
-                    f.write(uploaded_file.file.read())
-                file_paths.append(file_path)
-
-            rag = RagPipeline()
-            pages = rag.load_documents(tmpdirname, strict=False)
-            chunks = rag.split_chunks(pages)
-            embeddings = rag.create_embeddings(chunks)
-            vectors_stored = rag.add_embeddings_to_pinecone(embeddings)
-
-            return DocumentProcessSuccessResponse(
-                success=True,
-                message="Documents processed and stored successfully",
-                documents_processed=len(pages),
-                vectors_stored=vectors_stored,
-            ).dict()
-            
+            save_uploaded_files(uploaded_files, tmpdirname)
+            return ingest_folder(tmpdirname, replace=replace)
+
     except Exception as e:
         raise DocumentProcessingException(str(e))
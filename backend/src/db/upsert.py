@@ -0,0 +1,180 @@
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from pinecone.exceptions import PineconeProtocolError
+from urllib3.exceptions import HTTPError as TransportError
+from src.config import settings
+from src.core.exceptions import BaseAPIException
+from src.db.vector_store import VectorStore
+from src.core.metrics import CHUNKS, stage
+
+logger = logging.getLogger(__name__)
+
+# Approximate JSON size of one float in a REST upsert body
+_BYTES_PER_VALUE = 20
+# Errors are kept in the report up to this many messages
+_MAX_REPORTED_ERRORS = 10
+# Connection, timeout and protocol failures on the way to the remote store
+_TRANSPORT_ERRORS = (ConnectionError, TimeoutError, TransportError, PineconeProtocolError)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_payload_too_large(error: Exception) -> bool:
+    if _status_code(error) == 413:
+        return True
+    message = str(error).lower()
+    return "too large" in message or "exceeds the maximum" in message or "request size" in message
+
+
+def _is_retryable(error: Exception) -> bool:
+    """
+    Transport failures and 429/5xx responses of the remote store. Errors raised
+    by the store wrappers themselves (VectorStoreException, ValueError, ...)
+    are permanent and fail the batch at once.
+    """
+    if isinstance(error, BaseAPIException):
+        return False
+    if isinstance(error, _TRANSPORT_ERRORS):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def estimate_vector_bytes(vector: Dict[str, Any]) -> int:
+    """Rough request-body size of one vector, dominated by values and the metadata text."""
+    metadata = vector.get("metadata") or {}
+    return len(vector["id"]) + len(vector["values"]) * _BYTES_PER_VALUE + len(json.dumps(metadata)) + 64
+
+
+class ConcurrentUpserter:
+    """
+    Streams vectors into a VectorStore with several batches in flight.
+
+    Batches are cut at `max_batch_size` vectors or `max_request_bytes` of
+    estimated payload, whichever comes first, because metadata carries the full
+    chunk text. Each batch is retried with exponential backoff and jitter on
+    connection errors, 429 and 5xx. A batch rejected as too large is split in
+    half and the byte budget for later batches shrinks. Failed batches are
+    recorded rather than aborting the rest; see `report`. `on_batch_done` is
+    called from the worker threads with each successfully stored batch.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        namespace: Optional[str],
+        max_concurrency: int = settings.UPSERT_MAX_CONCURRENCY,
+        max_batch_size: int = 100,
+        max_request_bytes: int = settings.UPSERT_MAX_REQUEST_BYTES,
+        max_retries: int = settings.UPSERT_MAX_RETRIES,
+        backoff_seconds: float = settings.UPSERT_BACKOFF_SECONDS,
+        on_batch_done: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ):
+        self._store = vector_store
+        self._namespace = namespace
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_batch_size = max(1, max_batch_size)
+        self._byte_budget = max(1, max_request_bytes)
+        self._max_retries = max(0, max_retries)
+        self._backoff = backoff_seconds
+        self._on_batch_done = on_batch_done
+        self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency, thread_name_prefix="upsert")
+        self._slots = threading.BoundedSemaphore(self._max_concurrency * 2)
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        self._batch: List[Dict[str, Any]] = []
+        self._batch_bytes = 0
+        self._closed = False
+        self.report: Dict[str, Any] = {
+            "vectors_upserted": 0,
+            "vectors_failed": 0,
+            "batches_succeeded": 0,
+            "batches_failed": 0,
+            "retries": 0,
+            "splits": 0,
+            "failed_ids": [],
+            "errors": [],
+        }
+
+    def __enter__(self) -> "ConcurrentUpserter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, vectors: List[Dict[str, Any]]):
+        """Queue vectors; full batches are dispatched immediately. Blocks while too many are in flight."""
+        for vector in vectors:
+            size = estimate_vector_bytes(vector)
+            if self._batch and (
+                len(self._batch) >= self._max_batch_size or self._batch_bytes + size > self._byte_budget
+            ):
+                self._dispatch()
+            self._batch.append(vector)
+            self._batch_bytes += size
+
+    def close(self) -> Dict[str, Any]:
+        """Flush the last batch, wait for all in-flight batches and return the report."""
+        if self._closed:
+            return self.report
+        self._closed = True
+        if self._batch:
+            self._dispatch()
+        for future in self._futures:
+            future.result()
+        self._executor.shutdown(wait=True)
+        return self.report
+
+    def _dispatch(self):
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        self._slots.acquire()
+        future = self._executor.submit(self._upsert_batch, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _upsert_batch(self, batch: List[Dict[str, Any]]):
+        attempt = 0
+        while True:
+            try:
+                with stage("upsert"):
+                    stored = self._store.upsert(batch, namespace=self._namespace)
+            except Exception as e:
+                if _is_payload_too_large(e) and len(batch) > 1:
+                    with self._lock:
+                        self._byte_budget = max(1, self._byte_budget // 2)
+                        self.report["splits"] += 1
+                    middle = len(batch) // 2
+                    self._upsert_batch(batch[:middle])
+                    self._upsert_batch(batch[middle:])
+                    return
+                if attempt < self._max_retries and _is_retryable(e):
+                    attempt += 1
+                    with self._lock:
+                        self.report["retries"] += 1
+                    delay = self._backoff * (2 ** (attempt - 1))
+                    time.sleep(delay + random.uniform(0, delay))
+                    continue
+                with self._lock:
+                    self.report["batches_failed"] += 1
+                    self.report["vectors_failed"] += len(batch)
+                    self.report["failed_ids"].extend(vector["id"] for vector in batch)
+                    if len(self.report["errors"]) < _MAX_REPORTED_ERRORS:
+                        self.report["errors"].append(str(e))
+                CHUNKS.labels("failed").inc(len(batch))
+                logger.error("Upsert of %d vectors failed after %d retries: %s", len(batch), attempt, e)
+                return
+            with self._lock:
+                self.report["batches_succeeded"] += 1
+                self.report["vectors_upserted"] += stored
+            CHUNKS.labels("stored").inc(stored)
+            if self._on_batch_done is not None:
+                self._on_batch_done(batch)
+            return
@@ -0,0 +1,443 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+from src.config import settings
+from src.core.exceptions import VectorStoreException
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore(ABC):
+    """
+    Minimal vector database interface used by RagPipeline.
+
+    Vectors are dicts with 'id', 'values' and 'metadata'. Query results are
+    lists of match dicts with 'id', 'score' and 'metadata', best match first.
+    """
+
+    def initialize(self):
+        """Make sure the backing index exists. No-op by default."""
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None) -> int:
+        """Insert or overwrite vectors by id. Returns the number written."""
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int = 5, namespace: Optional[str] = None,
+              include_metadata: bool = True) -> List[Dict[str, Any]]:
+        """Return the `top_k` most similar vectors by cosine similarity."""
+
+    @abstractmethod
+    def delete(self, ids: List[str], namespace: Optional[str] = None) -> None:
+        """Remove vectors by id. Unknown ids are ignored."""
+
+    @abstractmethod
+    def list_namespaces(self) -> List[str]:
+        """Names of namespaces that currently hold vectors."""
+
+
+class PineconeVectorStore(VectorStore):
+    """VectorStore backed by the configured Pinecone index (the shared, pooled client)."""
+
+    @property
+    def index(self):
+        from src.config.clients import get_pinecone_index
+        return get_pinecone_index()
+
+    def initialize(self):
+        from src.config.pinecone_db import pinecone_connection
+        pinecone_connection()
+
+    def upsert(self, vectors, namespace=None) -> int:
+        self.index.upsert(vectors=vectors, namespace=namespace)
+        return len(vectors)
+
+    def query(self, vector, top_k=5, namespace=None, include_metadata=True):
+        results = self.index.query(
+            vector=vector,
+            top_k=top_k,
+            namespace=namespace,
+            include_metadata=include_metadata
+        )
+        return [
+            {
+                "id": match.get('id', ''),
+                "score": match.get('score', 0),
+                "metadata": match.get('metadata', {}) or {},
+            }
+            for match in results.get('matches', [])
+        ]
+
+    def delete(self, ids, namespace=None) -> None:
+        if ids:
+            self.index.delete(ids=list(ids), namespace=namespace)
+
+    def list_namespaces(self) -> List[str]:
+        stats = self.index.describe_index_stats()
+        return list((stats.get('namespaces') or {}).keys())
+
+
+class _Snapshot(NamedTuple):
+    """What a query reads: the vector matrix, liveness flags and row count at one point in time."""
+    vectors: np.ndarray
+    alive: np.ndarray
+    size: int
+    generation: int
+
+
+class _LocalNamespace:
+    """
+    One namespace of LocalVectorStore.
+
+    Unit-normalized float32 vectors live in a memory-mapped .npy file whose
+    row count is the capacity (doubled on growth). A SQLite side table maps
+    each row to its id, metadata and liveness; deleted rows are tombstoned and
+    reused by later upserts of the same id only. Once tombstones exceed
+    LOCAL_VECTOR_STORE_COMPACT_RATIO of the rows, live rows are rewritten into
+    a new file and renumbered in one SQLite transaction that also switches the
+    file name, so a crash leaves either the old or the new layout.
+
+    Writers serialize on a per-namespace lock. Queries take no lock: they
+    read an immutable snapshot (liveness is copied on write) and fetch
+    metadata on their own SQLite connection, retrying if a compaction
+    renumbered rows in between.
+    """
+
+    _INITIAL_CAPACITY = 1024
+    # Compaction is not worth it for fewer tombstones than this
+    _COMPACT_MIN_DEAD = 256
+    # Snapshot attempts before a query falls back to the write lock
+    _QUERY_ATTEMPTS = 2
+
+    def __init__(self, path: Path, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        path.mkdir(parents=True, exist_ok=True)
+        self._db_path = str(path / "metadata.sqlite3")
+        self._write_lock = threading.Lock()
+        self._readers = threading.local()
+        self.db = sqlite3.connect(self._db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+            "metadata TEXT NOT NULL, alive INTEGER NOT NULL DEFAULT 1)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.db.commit()
+
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'vectors_file'").fetchone()
+        self.vectors_path = path / (row[0] if row else "vectors.npy")
+        # Files left behind by an interrupted compaction
+        for stale in path.glob("vectors*.npy*"):
+            if stale != self.vectors_path:
+                stale.unlink(missing_ok=True)
+        if self.vectors_path.exists():
+            vectors = np.lib.format.open_memmap(str(self.vectors_path), mode="r+")
+            if vectors.shape[1] != dimension:
+                raise VectorStoreException(
+                    f"Local vector store at {path} has dimension {vectors.shape[1]}, expected {dimension}"
+                )
+        else:
+            vectors = np.lib.format.open_memmap(
+                str(self.vectors_path), mode="w+", dtype=np.float32,
+                shape=(self._INITIAL_CAPACITY, dimension)
+            )
+
+        size = self.db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+        alive = np.zeros(len(vectors), dtype=bool)
+        for (row,) in self.db.execute("SELECT row FROM vectors WHERE alive = 1"):
+            alive[row] = True
+        self._generation = 0
+        self._snapshot = _Snapshot(vectors, alive, size, 0)
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read connection; WAL lets it read while a writer commits."""
+        db = getattr(self._readers, "db", None)
+        if db is None:
+            db = sqlite3.connect(self._db_path, check_same_thread=False)
+            self._readers.db = db
+        return db
+
+    def _publish(self, vectors: np.ndarray, alive: np.ndarray, size: int):
+        self._snapshot = _Snapshot(vectors, alive, size, self._generation)
+
+    def _grow(self, vectors: np.ndarray, alive: np.ndarray, needed: int):
+        capacity = len(vectors)
+        if needed <= capacity:
+            return vectors, alive
+        while capacity < needed:
+            capacity *= 2
+        tmp_path = self.vectors_path.with_suffix(".npy.tmp")
+        grown = np.lib.format.open_memmap(
+            str(tmp_path), mode="w+", dtype=np.float32, shape=(capacity, self.dimension)
+        )
+        grown[:len(vectors)] = vectors
+        grown.flush()
+        del grown
+        vectors.flush()
+        # Queries still holding the old map keep reading it until they finish
+        os.replace(tmp_path, self.vectors_path)
+        vectors = np.lib.format.open_memmap(str(self.vectors_path), mode="r+")
+        grown_alive = np.zeros(capacity, dtype=bool)
+        grown_alive[:len(alive)] = alive
+        return vectors, grown_alive
+
+    def _existing_rows(self, ids: List[str]) -> Dict[str, int]:
+        """Map already stored ids to their rows, querying SQLite in bounded IN-lists."""
+        found: Dict[str, int] = {}
+        unique_ids = list(dict.fromkeys(ids))
+        for i in range(0, len(unique_ids), 500):
+            batch = unique_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self.db.execute(
+                f"SELECT id, row FROM vectors WHERE id IN ({placeholders})", batch
+            ))
+        return found
+
+    def upsert(self, vectors: List[Dict[str, Any]]) -> int:
+        if not vectors:
+            return 0
+        values = np.asarray([v["values"] for v in vectors], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise VectorStoreException(
+                f"Expected vectors of dimension {self.dimension}, got shape {values.shape}"
+            )
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+
+        with self._write_lock:
+            snapshot = self._snapshot
+            size = snapshot.size
+            assigned = self._existing_rows([v["id"] for v in vectors])
+            rows = []
+            for v in vectors:
+                row = assigned.get(v["id"])
+                if row is None:
+                    row = size
+                    size += 1
+                    assigned[v["id"]] = row
+                rows.append(row)
+            matrix, alive = self._grow(snapshot.vectors, snapshot.alive, size)
+
+            self.db.executemany(
+                "INSERT INTO vectors (row, id, metadata, alive) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(row) DO UPDATE SET id = excluded.id, metadata = excluded.metadata, alive = 1",
+                [(row, v["id"], json.dumps(v.get("metadata") or {})) for row, v in zip(rows, vectors)]
+            )
+            rows = np.asarray(rows)
+            matrix[rows] = values
+            matrix.flush()
+            self.db.commit()
+            alive = alive.copy()
+            alive[rows] = True
+            self._publish(matrix, alive, size)
+        return len(vectors)
+
+    def query(self, vector: List[float], top_k: int, include_metadata: bool) -> List[Dict[str, Any]]:
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+        for _ in range(self._QUERY_ATTEMPTS):
+            matches = self._query_snapshot(self._snapshot, self._reader(), q, top_k, include_metadata)
+            if matches is not None:
+                return matches
+        with self._write_lock:
+            return self._query_snapshot(self._snapshot, self.db, q, top_k, include_metadata)
+
+    def _query_snapshot(self, snapshot: _Snapshot, db: sqlite3.Connection, q: np.ndarray,
+                        top_k: int, include_metadata: bool) -> Optional[List[Dict[str, Any]]]:
+        """Top-k over one snapshot, or None if a compaction renumbered its rows meanwhile."""
+        size = snapshot.size
+        alive = snapshot.alive[:size]
+        k = min(top_k, int(alive.sum()))
+        if k <= 0:
+            return []
+        scores = snapshot.vectors[:size] @ q
+        scores[~alive] = -np.inf
+        if k < size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top])][:k]
+
+        placeholders = ",".join("?" * len(top))
+        records = {
+            row: (vector_id, metadata)
+            for row, vector_id, metadata in db.execute(
+                f"SELECT row, id, metadata FROM vectors WHERE row IN ({placeholders})",
+                [int(row) for row in top]
+            )
+        }
+        if self._generation != snapshot.generation:
+            return None
+        matches = []
+        for row in top:
+            record = records.get(int(row))
+            if record is None:
+                continue
+            vector_id, metadata = record
+            matches.append({
+                "id": vector_id,
+                "score": float(scores[row]),
+                "metadata": json.loads(metadata) if include_metadata else {},
+            })
+        return matches
+
+    def delete(self, ids: List[str]):
+        with self._write_lock:
+            rows = list(self._existing_rows(ids).values())
+            if not rows:
+                return
+            self.db.executemany("UPDATE vectors SET alive = 0 WHERE row = ?", [(row,) for row in rows])
+            self.db.commit()
+            snapshot = self._snapshot
+            alive = snapshot.alive.copy()
+            alive[np.asarray(rows)] = False
+            self._publish(snapshot.vectors, alive, snapshot.size)
+            dead = snapshot.size - int(alive[:snapshot.size].sum())
+            if dead >= self._COMPACT_MIN_DEAD and dead > settings.LOCAL_VECTOR_STORE_COMPACT_RATIO * snapshot.size:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite live rows contiguously into a new file; caller holds the write lock."""
+        snapshot = self._snapshot
+        live = np.flatnonzero(snapshot.alive[:snapshot.size])
+        capacity = self._INITIAL_CAPACITY
+        while capacity < len(live):
+            capacity *= 2
+        new_path = self.path / f"vectors-{uuid.uuid4().hex[:12]}.npy"
+        compacted = np.lib.format.open_memmap(
+            str(new_path), mode="w+", dtype=np.float32, shape=(capacity, self.dimension)
+        )
+        compacted[:len(live)] = snapshot.vectors[live]
+        compacted.flush()
+
+        records = self.db.execute("SELECT row, id, metadata FROM vectors WHERE alive = 1").fetchall()
+        new_rows = {int(row): i for i, row in enumerate(live)}
+        # Queries that read metadata from here on must not trust their row numbers
+        self._generation += 1
+        try:
+            with self.db:
+                self.db.execute("DELETE FROM vectors")
+                self.db.executemany(
+                    "INSERT INTO vectors (row, id, metadata, alive) VALUES (?, ?, ?, 1)",
+                    [(new_rows[row], vector_id, metadata) for row, vector_id, metadata in records]
+                )
+                self.db.execute(
+                    "INSERT INTO meta VALUES ('vectors_file', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (new_path.name,)
+                )
+        except Exception:
+            del compacted
+            new_path.unlink(missing_ok=True)
+            self._publish(snapshot.vectors, snapshot.alive, snapshot.size)
+            raise
+        old_path, self.vectors_path = self.vectors_path, new_path
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(live)] = True
+        self._publish(compacted, alive, len(live))
+        # Still-running queries keep the old map open; unlinking only drops the name
+        old_path.unlink(missing_ok=True)
+        logger.info(
+            "Compacted local vector namespace %s: %d -> %d rows", self.path.name, snapshot.size, len(live)
+        )
+
+    def live_count(self) -> int:
+        snapshot = self._snapshot
+        return int(snapshot.alive[:snapshot.size].sum())
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process VectorStore: exact cosine top-k over memory-mapped float32 vectors.
+    Each namespace is a directory under `root` holding its vectors file and a SQLite
+    metadata table. Namespaces lock independently and queries run without locks.
+    """
+
+    _DEFAULT_NAMESPACE = "__default__"
+
+    def __init__(self, root: str, dimension: int):
+        self._root = Path(root)
+        self._dimension = dimension
+        self._namespaces: Dict[str, _LocalNamespace] = {}
+        # Guards only the namespace registry
+        self._lock = threading.Lock()
+
+    def _dirname(self, namespace: Optional[str]) -> str:
+        if not namespace:
+            return self._DEFAULT_NAMESPACE
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)
+
+    def _namespace(self, namespace: Optional[str], create: bool = True) -> Optional[_LocalNamespace]:
+        name = self._dirname(namespace)
+        ns = self._namespaces.get(name)
+        if ns is not None:
+            return ns
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                path = self._root / name
+                if not create and not path.exists():
+                    return None
+                ns = _LocalNamespace(path, self._dimension)
+                self._namespaces[name] = ns
+            return ns
+
+    def initialize(self):
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    def upsert(self, vectors, namespace=None) -> int:
+        return self._namespace(namespace).upsert(vectors)
+
+    def query(self, vector, top_k=5, namespace=None, include_metadata=True):
+        ns = self._namespace(namespace, create=False)
+        if ns is None:
+            return []
+        return ns.query(vector, top_k, include_metadata)
+
+    def delete(self, ids, namespace=None) -> None:
+        ns = self._namespace(namespace, create=False)
+        if ns is not None:
+            ns.delete(list(ids))
+
+    def list_namespaces(self) -> List[str]:
+        if not self._root.is_dir():
+            return []
+        names = []
+        for path in sorted(self._root.iterdir()):
+            if path.is_dir() and self._namespace(path.name).live_count():
+                names.append("" if path.name == self._DEFAULT_NAMESPACE else path.name)
+        return names
+
+
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """Return the process-wide VectorStore selected by VECTOR_STORE_BACKEND."""
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                backend = settings.VECTOR_STORE_BACKEND
+                if backend == "pinecone":
+                    _vector_store = PineconeVectorStore()
+                elif backend == "local":
+                    _vector_store = LocalVectorStore(
+                        settings.LOCAL_VECTOR_STORE_DIR, settings.EMBEDDING_DIMENSION
+                    )
+                else:
+                    raise VectorStoreException(f"Unknown VECTOR_STORE_BACKEND: {backend}")
+    return _vector_store
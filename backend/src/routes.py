@@ -1,26 +1,55 @@
-import os
+import io
 import fitz
-import tempfile
-from fastapi import APIRouter, UploadFile, File, Form
-from src.schemas.response import QueryRequest
-from src.utils.swagger import uploadendpoint, queryendpoint
-from src.db.upload import process_uploaded_files
-from src.services.rag_service import get_rag_response
-from src.services.summarize_service import get_summary
+from fastapi import APIRouter, UploadFile, File, Form, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from src.config import settings
+from src.schemas.response import BatchQueryRequest, QueryRequest
+from src.utils.swagger import (
+    uploadendpoint, queryendpoint, jobendpoint, querybatchendpoint, querystreamendpoint, summarizestreamendpoint
+)
+from src.utils.sse import sse_response
+from src.services.job_service import job_service
+from src.services.warmup_service import warmup_service
+from src.services.rag_service import (
+    aget_batch_rag_responses, aget_rag_response, astream_rag_response, get_pipeline_stats
+)
+from src.services.summarize_service import get_summary, astream_summary
+from src.db.summary_cache import summary_cache
+from src.core.metrics import ERRORS, render_metrics
 from pathlib import Path
-from src.core.exceptions import LLMServiceAPIException, LLMServiceUnexpectedException
+from src.core.exceptions import (
+    LLMServiceAPIException,
+    LLMServiceUnexpectedException,
+    QueryBatchTooLargeException,
+    UploadTooLargeException,
+)
+from src.utils.uploads import read_bounded
 
 
 router = APIRouter()
 
 # --- File Upload Endpoint ---
 @router.post("/upload", **uploadendpoint)
-async def upload_files(uploaded_files: list[UploadFile] = File(...)):
+async def upload_files(uploaded_files: list[UploadFile] = File(...), replace: bool = Form(default=False)):
     """
-    Upload and process files, returning processing result.
+    Upload files and queue them for background ingestion, returning the job id.
+    With `replace`, each file replaces the document previously uploaded under its filename.
     """
-    result = process_uploaded_files(uploaded_files)
-    return result
+    job = await run_in_threadpool(job_service.submit, uploaded_files, replace)
+    return {
+        **job,
+        "statusCode": 202,
+        "success": True,
+    }
+
+# --- Ingestion Job Status Endpoint ---
+@router.get("/jobs/{job_id}", **jobendpoint)
+async def get_ingestion_job(job_id: str):
+    """
+    Return the status and per-stage progress of an ingestion job.
+    """
+    return job_service.get(job_id)
 
 # --- Query Endpoint ---
 @router.post("/query", **queryendpoint)
@@ -28,15 +57,126 @@ async def query_rag_service(request: QueryRequest):
     """
     Query the RAG service and return the response.
     """
-    response = get_rag_response(
+    response = await aget_rag_response(
         query=request.query,
         top_k=request.top_k,
-        min_score=request.min_score
+        min_score=request.min_score,
+        use_cache=request.use_cache,
     )
     return response
 
 
-# --- Summarize Endpoint ---
+# --- Batch Query Endpoint ---
+@router.post("/query/batch", **querybatchendpoint)
+async def query_rag_service_batch(request: BatchQueryRequest):
+    """
+    Answer a list of queries, returning per-query results in request order.
+    """
+    if len(request.queries) > settings.QUERY_BATCH_MAX_SIZE:
+        raise QueryBatchTooLargeException(len(request.queries), settings.QUERY_BATCH_MAX_SIZE)
+    results = await aget_batch_rag_responses(request.queries)
+    return {
+        "statusCode": 200,
+        "success": True,
+        "count": len(results),
+        "succeeded": sum(1 for result in results if result.statusCode == 200),
+        "results": results,
+    }
+
+
+# --- Streaming Query Endpoint ---
+@router.post("/query/stream", **querystreamendpoint)
+async def query_rag_service_stream(request: QueryRequest):
+    """
+    Query the RAG service and stream the answer as server-sent events:
+    'sources' first, then 'token' events as the LLM generates, then 'done'.
+    """
+    return sse_response(astream_rag_response(
+        query=request.query,
+        top_k=request.top_k,
+        min_score=request.min_score,
+        use_cache=request.use_cache,
+    ))
+
+
+# --- Stats Endpoint ---
+@router.get("/stats")
+async def pipeline_stats():
+    """
+    Return runtime counters of the query pipeline (embedding batch sizes, queue depth)
+    and of the summary cache.
+    """
+    return {
+        **get_pipeline_stats(),
+        "summary_cache": await run_in_threadpool(summary_cache.stats),
+    }
+
+
+# --- Liveness and Readiness Probes ---
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """
+    Liveness probe: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness probe: 200 once startup warmup has loaded the embedding model, 503 before
+    (or if warmup failed), with the per-step warmup status.
+    """
+    return JSONResponse(status_code=200 if warmup_service.ready else 503, content=warmup_service.status())
+
+
+# --- Prometheus Metrics Endpoint ---
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Return stage latencies and chunk, token, cache and error counters in Prometheus text format.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+# --- Summarize Endpoints ---
+def _extract_summary_text(filename: str, file) -> str:
+    """
+    Read an uploaded file (at most SUMMARIZE_MAX_FILE_BYTES) and extract its text
+    from memory, without a temporary copy on disk. Runs in a worker thread.
+    """
+    ext = Path(filename).suffix.lower()
+    if ext not in (".pdf", ".txt", ".docx"):
+        raise ValueError(f"Unsupported file type: {ext}")
+    contents = read_bounded(file, settings.SUMMARIZE_MAX_FILE_BYTES, filename)
+    if ext == ".pdf":
+        with fitz.open(stream=contents, filetype="pdf") as doc:
+            return "\n".join(
+                page.get_text("text") for page in doc
+            ).strip()
+    if ext == ".txt":
+        return contents.decode("utf-8", errors="ignore").strip()
+    from docx import Document as DocxDocument
+    doc = DocxDocument(io.BytesIO(contents))
+    return "\n".join(
+        p.text for p in doc.paragraphs if p.text.strip()
+    )
+
+
+async def _read_summary_input(file: UploadFile | None, text: str | None) -> str:
+    """
+    Extract the text to summarize from an uploaded file (PDF/TXT/DOCX) or plain text.
+    Raises ValueError for unsupported file types and UploadTooLargeException
+    for files over SUMMARIZE_MAX_FILE_BYTES.
+    """
+    if file and file.filename:
+        return await run_in_threadpool(_extract_summary_text, file.filename, file.file)
+    if text:
+        return text.strip()
+    return ""
+
+
 @router.post("/summarize")
 async def summarize_document(
     file: UploadFile | None = File(default=None),
@@ -49,50 +189,63 @@ async def summarize_document(
     style: 'short' | 'detailed' | 'bullets'
     llm:   'groq' | 'groq'
     """
-
-
-    raw_text = ""
-
     try:
-        if file and file.filename:
-            ext = Path(file.filename).suffix.lower()
-            contents = await file.read()
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(contents)
-                tmp_path = tmp.name
-            try:
-                if ext == ".pdf":
-                    with fitz.open(tmp_path) as doc:
-                        raw_text = "\n".join(
-                            page.get_text("text") for page in doc
-                        ).strip()
-                elif ext == ".txt":
-                    raw_text = contents.decode("utf-8", errors="ignore").strip()
-                elif ext == ".docx":
-                    from docx import Document as DocxDocument
-                    doc = DocxDocument(tmp_path)
-                    raw_text = "\n".join(
-                        p.text for p in doc.paragraphs if p.text.strip()
-                    )
-                else:
-                    return {"error": f"Unsupported file type: {ext}"}
-            finally:
-                os.unlink(tmp_path)
-
-        elif text:
-            raw_text = text.strip()
-
+        raw_text = await _read_summary_input(file, text)
         if not raw_text:
             return {"error": "No content provided. Upload a file or supply text."}
 
-        summary = get_summary(text=raw_text, style=style, llm=llm)
+        summary = await run_in_threadpool(get_summary, text=raw_text, style=style, llm=llm)
         return {
             "summary": summary,
             "filename": file.filename if file and file.filename else "text input",
             "word_count": len(raw_text.split()),
         }
 
+    except UploadTooLargeException:
+        raise
     except (LLMServiceAPIException, LLMServiceUnexpectedException) as e:
+        ERRORS.labels("summarize").inc()
         return {"error": str(e)}
     except Exception as e:
+        ERRORS.labels("summarize").inc()
         return {"error": str(e)}
+
+
+@router.post("/summarize/stream", **summarizestreamendpoint)
+async def summarize_document_stream(
+    file: UploadFile | None = File(default=None),
+    text: str | None = Form(default=None),
+    style: str = Form(default="detailed"),
+):
+    """
+    Summarize like /summarize, streamed as server-sent events: 'metadata'
+    (filename, word_count), 'token' per piece of the summary, then 'done',
+    or 'error' on failure.
+    """
+    try:
+        raw_text = await _read_summary_input(file, text)
+    except UploadTooLargeException:
+        raise
+    except Exception as e:
+        raw_text, read_error = "", str(e)
+    else:
+        read_error = None if raw_text else "No content provided. Upload a file or supply text."
+
+    async def events():
+        if read_error:
+            yield "error", {"error": read_error}
+            return
+        yield "metadata", {
+            "filename": file.filename if file and file.filename else "text input",
+            "word_count": len(raw_text.split()),
+        }
+        try:
+            async for token in astream_summary(raw_text, style=style):
+                yield "token", {"text": token}
+        except Exception as e:
+            ERRORS.labels("summarize").inc()
+            yield "error", {"error": str(e)}
+            return
+        yield "done", {"success": True}
+
+    return sse_response(events())
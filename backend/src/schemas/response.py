@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Union
 
 class ResponseBase(BaseModel):
     """Base response model"""
@@ -20,7 +20,31 @@ class DocumentProcessSuccessResponse(BaseModel):
     success: bool
     message: str
     documents_processed: int
+    chunks_processed: int = 0
     vectors_stored: int
+    files_skipped: int = 0
+    files_replaced: int = 0
+    vectors_deleted: int = 0
+    vectors_failed: int = 0
+
+class IngestionJobProgress(BaseModel):
+    pages_loaded: int = 0
+    chunks: int = 0
+    vectors_stored: int = 0
+
+class IngestionJobResponse(BaseModel):
+    statusCode: int = 200
+    success: bool = True
+    job_id: str
+    status: str  # queued | running | completed | failed
+    filenames: List[str] = []
+    replace: bool = False
+    progress: IngestionJobProgress = IngestionJobProgress()
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[DocumentProcessSuccessResponse] = None
+    error: Optional[str] = None
 
 class PaginatedResponse(BaseModel):
     """Paginated response model"""
@@ -50,4 +74,15 @@ class QueryNotFoundResponse(BaseModel):
 class QueryRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
-    min_score: Optional[float] = 0.5
\ No newline at end of file
+    min_score: Optional[float] = 0.5
+    use_cache: Optional[bool] = True
+
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+
+class BatchQueryResponse(BaseModel):
+    statusCode: int = 200
+    success: bool = True
+    count: int
+    succeeded: int
+    results: List[Union[QuerySuccessResponse, QueryNotFoundResponse]]
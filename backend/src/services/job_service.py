@@ -0,0 +1,206 @@
+# services/job_service.py
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from src.config import settings
+from src.core.exceptions import JobNotFoundException
+from src.db.upload import ingest_folder, save_uploaded_files
+from src.schemas.response import IngestionJobResponse
+from src.core.metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes of a running job
+_PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _finished_timestamp(job: Dict[str, Any]) -> float:
+    try:
+        return datetime.fromisoformat(job["finished_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+class IngestionJobService:
+    """
+    Runs /upload ingestion as background jobs (Singleton).
+
+    Each job lives in INGEST_JOBS_DIR/<job_id>/ with its uploaded files and a
+    job.json state file, so status survives a restart. At most
+    INGEST_MAX_CONCURRENT_JOBS jobs run at once, which keeps ingestion from
+    starving query traffic. Only queued and running jobs are held in memory;
+    finished ones are read from disk on request and deleted once older than
+    INGEST_JOB_RETENTION_SECONDS or beyond the newest INGEST_JOB_MAX_FINISHED.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(IngestionJobService, cls).__new__(cls)
+            cls._instance._root = Path(settings.INGEST_JOBS_DIR)
+            cls._instance._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.INGEST_MAX_CONCURRENT_JOBS),
+                thread_name_prefix="ingest-job",
+            )
+            cls._instance._jobs = {}
+            # (finished timestamp, job id) of finished jobs on disk, oldest first
+            cls._instance._finished = deque()
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self._root / job_id
+
+    def _files_dir(self, job_id: str) -> Path:
+        return self._job_dir(job_id) / "files"
+
+    def _save(self, job: Dict[str, Any]):
+        path = self._job_dir(job["job_id"]) / "job.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def submit(self, uploaded_files, replace: bool = False) -> Dict[str, Any]:
+        """
+        Persist the uploaded files as a new queued job and schedule it. With
+        `replace`, documents indexed under the same filenames are replaced.
+        """
+        job_id = uuid.uuid4().hex
+        files_dir = self._files_dir(job_id)
+        files_dir.mkdir(parents=True)
+        try:
+            filenames = save_uploaded_files(uploaded_files, str(files_dir))
+        except BaseException:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+            raise
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "filenames": filenames,
+            "replace": replace,
+            "progress": {"pages_loaded": 0, "chunks": 0, "vectors_stored": 0},
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+        self._executor.submit(self._run, job_id)
+        return dict(job)
+
+    def get(self, job_id: str) -> IngestionJobResponse:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id)
+            return IngestionJobResponse(**job)
+
+    def _load(self, job_id: str) -> Dict[str, Any]:
+        path = self._job_dir(job_id) / "job.json"
+        # Job ids are hex uuids; anything else cannot name a job directory
+        if not job_id.isalnum() or not path.exists():
+            raise JobNotFoundException(job_id)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = _now()
+            self._save(job)
+        last_flush = time.monotonic()
+
+        def progress(counter: str, increment: int):
+            nonlocal last_flush
+            with self._lock:
+                job["progress"][counter] += increment
+                if time.monotonic() - last_flush >= _PROGRESS_FLUSH_INTERVAL:
+                    last_flush = time.monotonic()
+                    self._save(job)
+
+        try:
+            result = ingest_folder(
+                str(self._files_dir(job_id)), progress=progress, replace=job.get("replace", False)
+            )
+            status, error = "completed", None
+        except Exception as e:
+            logger.exception("Ingestion job %s failed", job_id)
+            ERRORS.labels("ingest").inc()
+            result, status, error = None, "failed", str(e)
+
+        with self._lock:
+            job["status"] = status
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = _now()
+            self._save(job)
+            del self._jobs[job_id]
+            self._finished.append((_finished_timestamp(job), job_id))
+        shutil.rmtree(self._files_dir(job_id), ignore_errors=True)
+        self._prune()
+
+    def _prune(self):
+        """Delete finished jobs past the retention age or count."""
+        cutoff = time.time() - settings.INGEST_JOB_RETENTION_SECONDS
+        with self._lock:
+            while self._finished and (
+                self._finished[0][0] < cutoff or len(self._finished) > max(0, settings.INGEST_JOB_MAX_FINISHED)
+            ):
+                _, job_id = self._finished.popleft()
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def recover(self):
+        """
+        Reload persisted jobs after a restart. Interrupted jobs whose files are
+        still on disk are queued again; the rest are marked failed.
+        """
+        if not self._root.is_dir():
+            return
+        finished: List[Tuple[float, str]] = []
+        for job_dir in sorted(self._root.iterdir()):
+            try:
+                job = self._load(job_dir.name)
+            except (JobNotFoundException, ValueError, OSError):
+                continue
+            if job["status"] not in ("queued", "running"):
+                finished.append((_finished_timestamp(job), job["job_id"]))
+                continue
+            with self._lock:
+                if not self._files_dir(job["job_id"]).is_dir():
+                    job["status"] = "failed"
+                    job["error"] = "Interrupted by a restart and its files are gone"
+                    job["finished_at"] = _now()
+                    self._save(job)
+                    finished.append((_finished_timestamp(job), job["job_id"]))
+                    continue
+                self._jobs[job["job_id"]] = job
+                job["status"] = "queued"
+                job["progress"] = {"pages_loaded": 0, "chunks": 0, "vectors_stored": 0}
+                self._save(job)
+            logger.info("Re-queueing interrupted ingestion job %s", job['job_id'])
+            self._executor.submit(self._run, job["job_id"])
+        with self._lock:
+            # Re-queued jobs may already have finished and been recorded
+            self._finished = deque(sorted([*finished, *self._finished]))
+        self._prune()
+
+
+job_service = IngestionJobService()
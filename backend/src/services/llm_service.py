@@ -1,40 +1,86 @@
 # services/llm_service.py
-from typing import Optional
+import time
+from typing import AsyncIterator
 from src.config import settings
-from groq import Groq, APIError
+from groq import Groq, AsyncGroq, APIError
+from src.config.clients import get_async_groq_client, get_groq_client
 from src.core.exceptions import LLMServiceAPIException, LLMServiceUnexpectedException
 from src.core.prompts import RAG_QA_PROMPT_TEMPLATE
+from src.core.metrics import LLM_TOKENS, STAGE_ERRORS, observe_stage, stage
+
+# Completion limits; prompt budgets reserve these tokens of the context window
+TEXT_MAX_TOKENS = 2048
+ANSWER_MAX_TOKENS = 1024
 
 
 class LLMService:
     """
     Groq-backed LLM service (Singleton).
     Used by the RAG pipeline for question answering.
+    Exposes blocking methods and `a`-prefixed coroutine variants backed by
+    an AsyncGroq client, so async routes never block the event loop.
+    `astream_*` methods yield the completion token by token as it arrives.
+    Clients come from the shared pooled registry and are created on first use,
+    so importing the service needs no network or API key.
     """
     _instance = None
-    _client: Optional[Groq] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(LLMService, cls).__new__(cls)
-            cls._client = Groq(api_key=settings.GROQ_API_KEY)
         return cls._instance
 
+    @property
+    def client(self) -> Groq:
+        return get_groq_client()
+
+    @property
+    def async_client(self) -> AsyncGroq:
+        return get_async_groq_client()
+
+    @staticmethod
+    def _record_usage(usage):
+        """Count the prompt and completion tokens Groq reports for a call."""
+        if usage is None:
+            return
+        LLM_TOKENS.labels("prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+        LLM_TOKENS.labels("completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+    @staticmethod
+    def _extract_content(chat_completion) -> str:
+        LLMService._record_usage(getattr(chat_completion, "usage", None))
+        content = chat_completion.choices[0].message.content
+        if content is None:
+            raise LLMServiceUnexpectedException("LLM returned empty response")
+        return content.strip()
+
     def generate_text(self, prompt: str) -> str:
         """Send a raw prompt and return the model response."""
-        if self._client is None:
-            raise LLMServiceUnexpectedException("LLM client not initialized")
         try:
-            chat_completion = self._client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=settings.LLAMA_LLM_MODEL,
-                temperature=0.3,
-                max_tokens=2048,
-            )
-            content = chat_completion.choices[0].message.content
-            if content is None:
-                raise LLMServiceUnexpectedException("LLM returned empty response")
-            return content.strip()
+            with stage("llm"):
+                chat_completion = self.client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=settings.LLAMA_LLM_MODEL,
+                    temperature=0.3,
+                    max_tokens=TEXT_MAX_TOKENS,
+                )
+            return self._extract_content(chat_completion)
+        except APIError as e:
+            raise LLMServiceAPIException(str(e))
+        except Exception as e:
+            raise LLMServiceUnexpectedException(str(e))
+
+    async def agenerate_text(self, prompt: str) -> str:
+        """Async variant of `generate_text`."""
+        try:
+            with stage("llm"):
+                chat_completion = await self.async_client.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}],
+                    model=settings.LLAMA_LLM_MODEL,
+                    temperature=0.3,
+                    max_tokens=TEXT_MAX_TOKENS,
+                )
+            return self._extract_content(chat_completion)
         except APIError as e:
             raise LLMServiceAPIException(str(e))
         except Exception as e:
@@ -42,24 +88,81 @@ class LLMService:
 
     def generate_answer(self, context: str, question: str) -> str:
         """Generates an answer using the Groq client."""
-        if self._client is None:
-            raise LLMServiceUnexpectedException("LLM client not initialized")
         try:
             formatted_prompt = RAG_QA_PROMPT_TEMPLATE.format(context=context, question=question)
-            chat_completion = self._client.chat.completions.create(
-                messages=[{"role": "user", "content": formatted_prompt}],
+            with stage("llm"):
+                chat_completion = self.client.chat.completions.create(
+                    messages=[{"role": "user", "content": formatted_prompt}],
+                    model=settings.LLAMA_LLM_MODEL,
+                    temperature=0.2,
+                    max_tokens=ANSWER_MAX_TOKENS,
+                )
+            return self._extract_content(chat_completion)
+        except APIError as e:
+            raise LLMServiceAPIException(str(e))
+        except Exception as e:
+            raise LLMServiceUnexpectedException(str(e))
+
+    async def agenerate_answer(self, context: str, question: str) -> str:
+        """Async variant of `generate_answer`."""
+        try:
+            formatted_prompt = RAG_QA_PROMPT_TEMPLATE.format(context=context, question=question)
+            with stage("llm"):
+                chat_completion = await self.async_client.chat.completions.create(
+                    messages=[{"role": "user", "content": formatted_prompt}],
+                    model=settings.LLAMA_LLM_MODEL,
+                    temperature=0.2,
+                    max_tokens=ANSWER_MAX_TOKENS,
+                )
+            return self._extract_content(chat_completion)
+        except APIError as e:
+            raise LLMServiceAPIException(str(e))
+        except Exception as e:
+            raise LLMServiceUnexpectedException(str(e))
+
+    async def _astream(self, prompt: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """
+        Stream a completion. Time to first token is recorded as the 'llm_first_token'
+        stage and the whole stream (including time the consumer holds it) as 'llm'.
+        """
+        started = time.perf_counter()
+        first_token = True
+        try:
+            stream = await self.async_client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
                 model=settings.LLAMA_LLM_MODEL,
-                temperature=0.2,
-                max_tokens=1024,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
             )
-            content = chat_completion.choices[0].message.content
-            if content is None:
-                raise LLMServiceUnexpectedException("LLM returned empty response")
-            return content.strip()
+            async for chunk in stream:
+                # Groq reports usage on the final chunk of a stream
+                self._record_usage(getattr(getattr(chunk, "x_groq", None), "usage", None))
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    if first_token:
+                        observe_stage("llm_first_token", time.perf_counter() - started)
+                        first_token = False
+                    yield token
         except APIError as e:
+            STAGE_ERRORS.labels("llm").inc()
             raise LLMServiceAPIException(str(e))
         except Exception as e:
+            STAGE_ERRORS.labels("llm").inc()
             raise LLMServiceUnexpectedException(str(e))
+        finally:
+            observe_stage("llm", time.perf_counter() - started)
+
+    def astream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Streaming variant of `generate_text`; yields tokens as they arrive."""
+        return self._astream(prompt, temperature=0.3, max_tokens=TEXT_MAX_TOKENS)
+
+    def astream_answer(self, context: str, question: str) -> AsyncIterator[str]:
+        """Streaming variant of `generate_answer`; yields tokens as they arrive."""
+        formatted_prompt = RAG_QA_PROMPT_TEMPLATE.format(context=context, question=question)
+        return self._astream(formatted_prompt, temperature=0.2, max_tokens=ANSWER_MAX_TOKENS)
 
 
 llm_service = LLMService()
@@ -1,17 +1,249 @@
-from src.schemas.response import QueryNotFoundResponse, QuerySuccessResponse
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Set, Tuple
+import numpy as np
+from src.config import settings
+from src.schemas.response import QueryNotFoundResponse, QueryRequest, QuerySuccessResponse
 from src.utils.document_processor import RagPipeline
-from src.services.llm_service import llm_service
+from src.services.llm_service import llm_service, ANSWER_MAX_TOKENS
+from src.core.prompts import RAG_QA_PROMPT_TEMPLATE
+from src.utils.token_budget import pack_by_relevance, prompt_budget
 from src.core.constants import FALLBACK_MESSAGE
+from src.core.exceptions import LLMServiceUnexpectedException
+from src.core.metrics import ERRORS, record_cache, stage
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
 
 try:
     rag_pipeline = RagPipeline()
 except Exception as e:
     raise RuntimeError(f"Failed to initialize RagPipeline: {e}")
 
-def get_rag_response(query: str, top_k: int = 5, min_score: float = 0.8):
+
+class SemanticAnswerCache:
     """
-    Orchestrates the RAG process to get a final answer from the LLM.
+    Bounded LRU cache of final answers keyed by query embedding and retrieved chunk set.
+
+    A lookup hits when an entry was produced from exactly the same set of chunk ids
+    and its query embedding has cosine similarity >= `threshold` with the new query.
+    Embeddings are normalized, so cosine similarity is a dot product.
+    """
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.95):
+        self._max_size = max(1, max_size)
+        self._threshold = threshold
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._by_chunks: Dict[FrozenSet[str], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, query_emb: List[float], chunk_ids: FrozenSet[str]) -> Optional[QuerySuccessResponse]:
+        response = self._lookup(query_emb, chunk_ids)
+        record_cache("answer", response is not None)
+        return response
+
+    def _lookup(self, query_emb: List[float], chunk_ids: FrozenSet[str]) -> Optional[QuerySuccessResponse]:
+        with self._lock:
+            candidates = list(self._by_chunks.get(chunk_ids, ()))
+            if not candidates:
+                self.misses += 1
+                return None
+            matrix = np.stack([self._entries[entry_id][0] for entry_id in candidates])
+            similarities = matrix @ np.asarray(query_emb, dtype=np.float32)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self._threshold:
+                self.misses += 1
+                return None
+            entry_id = candidates[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return self._entries[entry_id][2]
+
+    def store(self, query_emb: List[float], chunk_ids: FrozenSet[str], response: QuerySuccessResponse):
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (np.asarray(query_emb, dtype=np.float32), chunk_ids, response)
+            self._by_chunks.setdefault(chunk_ids, set()).add(entry_id)
+            while len(self._entries) > self._max_size:
+                old_id, (_, old_chunks, _) = self._entries.popitem(last=False)
+                bucket = self._by_chunks[old_chunks]
+                bucket.discard(old_id)
+                if not bucket:
+                    del self._by_chunks[old_chunks]
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "similarity_threshold": self._threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+answer_cache = SemanticAnswerCache(
+    max_size=settings.ANSWER_CACHE_MAX_SIZE,
+    threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+)
+
+
+def _chunk_ids(docs) -> FrozenSet[str]:
+    return frozenset(doc.metadata.get('id', '') for doc in docs)
+
+
+def _cached_answer(query: str, query_emb: List[float], chunk_ids: FrozenSet[str]) -> Optional[QuerySuccessResponse]:
+    cached = answer_cache.lookup(query_emb, chunk_ids)
+    if cached is None:
+        return None
+    logger.debug("Answer cache hit for query: %r", query)
+    return cached.model_copy(update={"query": query})
+
+
+def get_pipeline_stats() -> dict:
+    """Runtime counters of the query path, exposed by the /stats endpoint."""
+    return {
+        # Reported once the model is loaded; /stats must not trigger the load
+        "embedding_batcher": rag_pipeline.embedding_batcher.stats() if RagPipeline.embedding_model_loaded() else None,
+        **RagPipeline.cache_stats(),
+        "answer_cache": answer_cache.stats(),
+    }
+
+
+def _not_found_response(query: str) -> QueryNotFoundResponse:
+    logger.debug("No relevant chunks for query: %r", query)
+    return QueryNotFoundResponse(
+        statusCode=404,
+        success=False,
+        message="Information not found",
+        query=query,
+        answer=FALLBACK_MESSAGE
+    )
+
+
+def _relevance(doc) -> float:
+    """Fused hybrid relevance when available, otherwise the dense similarity score."""
+    return doc.metadata.get('relevance', doc.metadata.get('score', 0))
+
+
+def _format_doc(doc) -> str:
+    title = doc.metadata.get('title') or doc.metadata.get('filename') or 'Untitled'
+    section = doc.metadata.get('section')
+    category = doc.metadata.get('category') or 'General'
+    score = _relevance(doc)
+
+    header = f"Document: {title}"
+    if section:
+        header += f", Section: {section}"
+
+    return (
+        f"{header}\n"
+        f"Category: {category}\n"
+        f"Relevance Score: {score:.2f}\n"
+        f"Content:\n{doc.page_content}"
+    )
+
+
+def _build_context(docs, query: str) -> str:
+    """
+    Prepare the context for the LLM from retrieved documents.
+    Each document is formatted with metadata to help the LLM understand the source and relevance.
+    Documents are packed most relevant first into the tokens the prompt has left
+    after the question and the reserved answer length.
+    """
+    separator = "\n\n---\n\n"
+    with stage("context_build"):
+        budget = prompt_budget(
+            RAG_QA_PROMPT_TEMPLATE.format(context="", question=query),
+            max_completion_tokens=ANSWER_MAX_TOKENS,
+        )
+        formatted_docs = pack_by_relevance(
+            docs,
+            render=_format_doc,
+            budget=budget,
+            score=_relevance,
+            separator=separator,
+        )
+    if len(formatted_docs) < len(docs):
+        logger.debug("Context budget of %d tokens fits %d of %d documents", budget, len(formatted_docs), len(docs))
+
+    return "\n\n" + separator.join(formatted_docs)
+
+
+def _unique_sources(docs) -> List[str]:
+    """Deduplicate source filenames (case-insensitive)."""
+    seen = {}
+    for doc in docs:
+        name = doc.metadata.get('filename', '')
+        if name and name.lower() not in seen:
+            seen[name.lower()] = name
+    return list(seen.values())
+
+
+def _source_url(highest_url) -> Optional[str]:
+    """Return the highest scored source URL if it is a usable http(s) link."""
+    is_valid_url = (
+        highest_url and
+        highest_url != "NA" and
+        isinstance(highest_url, str) and
+        (highest_url.startswith("http://") or highest_url.startswith("https://"))
+    )
+    return highest_url if is_valid_url else None
+
+
+def _build_success_response(query: str, docs, highest_url, final_answer: str) -> QuerySuccessResponse:
+    # Create response object
+    response = QuerySuccessResponse(
+        statusCode=200,
+        success=True,
+        message="Answer retrieved successfully",
+        query=query,
+        answer=final_answer,
+        sources=_unique_sources(docs),
+    )
+
+    # If the answer is the fallback message, don't include a source URL.
+    if final_answer.strip() == FALLBACK_MESSAGE.strip():
+        return response
+
+    source_url = _source_url(highest_url)
+    if source_url:
+        response.answer = f"{response.answer}\nSource: {source_url}"
+
+    # Always return the response object
+    return response
+
+
+def _error_response(query: str, e: Exception) -> QueryNotFoundResponse:
+    logger.error("Error in RAG pipeline for query %r: %s", query, e)
+    ERRORS.labels("query").inc()
+
+    return QueryNotFoundResponse(
+        statusCode=500,
+        success=False,
+        message=f"Error processing PDF documents: {str(e)}",
+        query=query,
+        answer="An error occurred while searching through the PDF documents. Please try again or rephrase your query."
+    )
 
+
+def get_rag_response(query: str, top_k: int = 5, min_score: float = 0.8, use_cache: bool = True):
+    """
+    Orchestrates the RAG process to get a final answer from the LLM.
+    With `use_cache=False` the semantic answer cache is not consulted; the
+    fresh answer still replaces any cached one.
     """
     try:
         # 1. Retrieve relevant document chunks and highest scored vector website
@@ -23,86 +255,161 @@ def get_rag_response(query: str, top_k: int = 5, min_score: float = 0.8):
 
         # 2. Handle the case where no relevant information is found
         if not docs:
-            print(f"Answer: {FALLBACK_MESSAGE}")
-            return QueryNotFoundResponse(
-                statusCode=404,
-                success=False,
-                message="Information not found",
+            return _not_found_response(query)
+
+        # 3. Reuse the answer of a near-duplicate question over the same chunks
+        chunk_ids = _chunk_ids(docs)
+        query_emb = rag_pipeline.embed_query(query)
+        if use_cache:
+            cached = _cached_answer(query, query_emb, chunk_ids)
+            if cached is not None:
+                return cached
+
+        # 4. Prepare the context for the LLM from retrieved documents
+        context = _build_context(docs, query)
+
+        # 5. Generate the final answer using the LLM
+        final_answer = llm_service.generate_answer(context=context, question=query)
+        response = _build_success_response(query, docs, highest_url, final_answer)
+        answer_cache.store(query_emb, chunk_ids, response)
+        return response
+
+    except Exception as e:
+        return _error_response(query, e)
+
+
+async def aget_rag_response(
+    query: str,
+    top_k: int = 5,
+    min_score: float = 0.8,
+    use_cache: bool = True,
+    query_emb: Optional[List[float]] = None,
+    retrieval_limit: Optional[asyncio.Semaphore] = None,
+    llm_limit: Optional[asyncio.Semaphore] = None,
+):
+    """
+    Async variant of `get_rag_response` used by the API routes.
+    Embedding, vector search and the LLM call are all awaited, so a slow
+    Groq completion no longer stalls other requests on the worker.
+    Batch callers pass a precomputed `query_emb` and semaphores bounding
+    concurrent retrievals and LLM calls.
+    """
+    try:
+        async with retrieval_limit or nullcontext():
+            docs, highest_url = await rag_pipeline.aretrieve_relevant_chunks(
                 query=query,
-                answer=FALLBACK_MESSAGE
+                top_k=top_k,
+                min_score=min_score,
+                query_emb=query_emb,
             )
 
-        # 3. Prepare the context for the LLM from retrieved documents
-        # Format each document with metadata to help the LLM understand the source and relevance
-        formatted_docs = []
-        for doc in docs:
-            title = doc.metadata.get('title') or doc.metadata.get('filename') or 'Untitled'
-            section = doc.metadata.get('section')
-            category = doc.metadata.get('category') or 'General'
-            score = doc.metadata.get('score', 0)
-
-            header = f"Document: {title}"
-            if section:
-                header += f", Section: {section}"
-
-            formatted_doc = (
-                f"{header}\n"
-                f"Category: {category}\n"
-                f"Relevance Score: {score:.2f}\n"
-                f"Content:\n{doc.page_content}"
-            )
-            formatted_docs.append(formatted_doc)
-            
-        context = "\n\n" + "\n\n---\n\n".join(formatted_docs)
+        if not docs:
+            return _not_found_response(query)
 
-        # 4. Generate the final answer using the LLM
-        final_answer = llm_service.generate_answer(context=context, question=query)
-        print(f"Answer: {final_answer}")
-
-        # Deduplicate source filenames (case-insensitive)
-        seen = {}
-        for doc in docs:
-            name = doc.metadata.get('filename', '')
-            if name and name.lower() not in seen:
-                seen[name.lower()] = name
-        unique_sources = list(seen.values())
-
-        # Create response object
-        response = QuerySuccessResponse(
-            statusCode=200,
-            success=True,
-            message="Answer retrieved successfully",
-            query=query,
-            answer=final_answer,
-            sources=unique_sources,
-        )
-        
-        # If the answer is the fallback message, don't include a source URL.
-        if final_answer.strip() == FALLBACK_MESSAGE.strip():
-            return response
-
-        # Handle source URL with improved validation
-        is_valid_url = (
-            highest_url and 
-            highest_url != "NA" and 
-            isinstance(highest_url, str) and 
-            (highest_url.startswith("http://") or highest_url.startswith("https://"))
-        )
-        
-        if is_valid_url:
-            response.answer = f"{response.answer}\nSource: {highest_url}"
-        
-        # Always return the response object
+        chunk_ids = _chunk_ids(docs)
+        if query_emb is None:
+            query_emb = await rag_pipeline.aembed_query(query)
+        if use_cache:
+            cached = _cached_answer(query, query_emb, chunk_ids)
+            if cached is not None:
+                return cached
+
+        context = await run_in_threadpool(_build_context, docs, query)
+
+        async with llm_limit or nullcontext():
+            final_answer = await llm_service.agenerate_answer(context=context, question=query)
+        response = _build_success_response(query, docs, highest_url, final_answer)
+        answer_cache.store(query_emb, chunk_ids, response)
         return response
 
     except Exception as e:
-        # Log the error for debugging
-        print(f"Error in RAG pipeline for query '{query}': {str(e)}")
-        
-        return QueryNotFoundResponse(
-            statusCode=500,
-            success=False,
-            message=f"Error processing PDF documents: {str(e)}",
+        return _error_response(query, e)
+
+
+async def aget_batch_rag_responses(requests: List[QueryRequest]) -> List[Any]:
+    """
+    Answer many queries at once, returning one response per request in order.
+    All queries are encoded in a single batched `encode` call; retrievals and
+    LLM calls then run concurrently, bounded by QUERY_BATCH_RETRIEVAL_CONCURRENCY
+    and QUERY_BATCH_LLM_CONCURRENCY. A failing query gets its own error response
+    and does not affect the rest of the batch.
+    """
+    queries = [request.query for request in requests]
+    try:
+        embeddings = await rag_pipeline.aembed_queries(queries)
+    except Exception as e:
+        return [_error_response(query, e) for query in queries]
+
+    retrieval_limit = asyncio.Semaphore(max(1, settings.QUERY_BATCH_RETRIEVAL_CONCURRENCY))
+    llm_limit = asyncio.Semaphore(max(1, settings.QUERY_BATCH_LLM_CONCURRENCY))
+    return await asyncio.gather(*(
+        aget_rag_response(
+            query=request.query,
+            top_k=request.top_k,
+            min_score=request.min_score,
+            use_cache=request.use_cache,
+            query_emb=query_emb,
+            retrieval_limit=retrieval_limit,
+            llm_limit=llm_limit,
+        )
+        for request, query_emb in zip(requests, embeddings)
+    ))
+
+
+async def astream_rag_response(
+    query: str, top_k: int = 5, min_score: float = 0.8, use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of `aget_rag_response` yielding (event, data) pairs:
+    'sources' once retrieval is done, 'token' for each piece of the answer as
+    the LLM produces it, then 'done'. Failures end the stream with 'error'.
+    The complete answer is stored in the answer cache like a regular query.
+    """
+    try:
+        docs, highest_url = await rag_pipeline.aretrieve_relevant_chunks(
             query=query,
-            answer="An error occurred while searching through the PDF documents. Please try again or rephrase your query."
-        )
\ No newline at end of file
+            top_k=top_k,
+            min_score=min_score,
+        )
+
+        if not docs:
+            response = _not_found_response(query)
+            yield "token", {"text": response.answer}
+            yield "done", {"statusCode": response.statusCode, "success": False, "message": response.message}
+            return
+
+        chunk_ids = _chunk_ids(docs)
+        query_emb = await rag_pipeline.aembed_query(query)
+        cached = _cached_answer(query, query_emb, chunk_ids) if use_cache else None
+
+        source_url = _source_url(highest_url)
+        yield "sources", {
+            "query": query,
+            "sources": _unique_sources(docs),
+            "source_url": source_url,
+            "cached": cached is not None,
+        }
+
+        if cached is not None:
+            # source_url is already in the 'sources' event
+            answer = cached.answer
+            if source_url:
+                answer = answer.removesuffix(f"\nSource: {source_url}")
+            yield "token", {"text": answer}
+        else:
+            context = await run_in_threadpool(_build_context, docs, query)
+            tokens = []
+            async for token in llm_service.astream_answer(context=context, question=query):
+                tokens.append(token)
+                yield "token", {"text": token}
+            final_answer = "".join(tokens).strip()
+            if not final_answer:
+                raise LLMServiceUnexpectedException("LLM returned empty response")
+            answer_cache.store(query_emb, chunk_ids, _build_success_response(query, docs, highest_url, final_answer))
+
+        yield "done", {"statusCode": 200, "success": True, "message": "Answer retrieved successfully"}
+
+    except Exception as e:
+        response = _error_response(query, e)
+        yield "error", {"statusCode": response.statusCode, "success": False,
+                        "message": response.message, "answer": response.answer}
@@ -1,12 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List
+from fastapi.concurrency import run_in_threadpool
+from src.config import settings
+from src.db.summary_cache import summary_cache
 from src.services.llm_service import llm_service
+from src.utils.token_budget import count_tokens, split_by_tokens
 from src.core.prompts import (
     SHORT_PASS_SUMMARY_PROMPT_TEMPLATE,
     MAP_CHUNK_SUMMARY_PROMPT_TEMPLATE,
+    INTERMEDIATE_SUMMARY_COMBINE_PROMPT_TEMPLATE,
     REDUCE_SUMMARY_COMBINE_PROMPT_TEMPLATE,
 )
 
-# Max characters sent to LLM in a single call (~8k tokens for safety margin)
-CHUNK_SIZE = 8000
+# Max document tokens sent to the LLM in a single map or combine call
+CHUNK_TOKENS = settings.SUMMARY_CHUNK_TOKENS
+
+SUMMARY_SEPARATOR = "\n\n---\n\n"
 
 _STYLE_INSTRUCTIONS = {
     "short": "short paragraph summary (3-5 sentences)",
@@ -14,10 +23,86 @@ _STYLE_INSTRUCTIONS = {
     "bullets": "bullet-point summary listing the key points",
 }
 
+# Shared by all requests so concurrent summaries together stay within the
+# Groq rate limit; the SDK itself retries 429s with backoff.
+_llm_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.SUMMARY_MAX_CONCURRENCY),
+    thread_name_prefix="summarize",
+)
+
+
+def _generate_all(prompts: List[str]) -> List[str]:
+    """Run the prompts concurrently on the shared pool, keeping their order."""
+    return list(_llm_executor.map(llm_service.generate_text, prompts))
+
+
+def _group_summaries(summaries: List[str]) -> List[List[str]]:
+    """
+    Pack consecutive summaries into groups that fit in one LLM call.
+    Every group holds at least two summaries so each level shrinks the list.
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_size = 0
+    separator_tokens = count_tokens(SUMMARY_SEPARATOR)
+    for summary in summaries:
+        size = count_tokens(summary) + separator_tokens
+        if len(current) >= 2 and current_size + size > CHUNK_TOKENS:
+            groups.append(current)
+            current, current_size = [], 0
+        current.append(summary)
+        current_size += size
+    if current:
+        # A trailing single summary joins the previous group rather than being re-summarized alone
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+    return groups
+
+
+def _section_summaries(text: str, doc_key: str) -> List[str]:
+    """
+    Style-independent summaries of a long document: chunks are summarized
+    concurrently, then merged level by level until they fit in the final
+    combine prompt. Cached per document so a new style skips this step.
+    """
+    cached = summary_cache.get_sections(doc_key)
+    if cached is not None:
+        return cached
+
+    # Map phase over chunks cut on paragraph boundaries
+    chunks = split_by_tokens(text, CHUNK_TOKENS)
+    summaries = _generate_all([MAP_CHUNK_SUMMARY_PROMPT_TEMPLATE.format(text=chunk) for chunk in chunks])
+
+    # Tree reduce: each level merges groups of neighbouring summaries in parallel
+    while len(summaries) > 1 and count_tokens(SUMMARY_SEPARATOR.join(summaries)) > CHUNK_TOKENS:
+        groups = _group_summaries(summaries)
+        summaries = _generate_all([
+            INTERMEDIATE_SUMMARY_COMBINE_PROMPT_TEMPLATE.format(summaries=SUMMARY_SEPARATOR.join(group))
+            for group in groups
+        ])
+
+    summary_cache.set_sections(doc_key, summaries)
+    return summaries
+
+
+def _final_prompt(text: str, style: str, doc_key: str) -> str:
+    """Build the prompt that produces the final summary; long documents are map-reduced first."""
+    style_desc = _STYLE_INSTRUCTIONS[style]
+    if count_tokens(text) <= CHUNK_TOKENS:
+        return SHORT_PASS_SUMMARY_PROMPT_TEMPLATE.format(text=text, style=style_desc)
+
+    return REDUCE_SUMMARY_COMBINE_PROMPT_TEMPLATE.format(
+        summaries=SUMMARY_SEPARATOR.join(_section_summaries(text, doc_key)), style=style_desc
+    )
+
+
 def get_summary(text: str, style: str = "detailed", llm: str = "groq") -> str:
     """
     Summarize `text` using Groq and the given summary style.
-    Automatically uses map-reduce for long documents.
+    Automatically uses map-reduce for long documents. Results are served from
+    the persistent summary cache when the same text was summarized before.
 
     Args:
         text:  Raw document text to summarize.
@@ -27,26 +112,46 @@ def get_summary(text: str, style: str = "detailed", llm: str = "groq") -> str:
     Returns:
         Summary string.
     """
-    service = llm_service
-    style_desc = _STYLE_INSTRUCTIONS.get(style, _STYLE_INSTRUCTIONS["detailed"])
+    style = style if style in _STYLE_INSTRUCTIONS else "detailed"
 
     text = text.strip()
     if not text:
         return "No text provided for summarization."
 
-    if len(text) <= CHUNK_SIZE:
-        prompt = SHORT_PASS_SUMMARY_PROMPT_TEMPLATE.format(text=text, style=style_desc)
-        return service.generate_text(prompt)
+    doc_key = summary_cache.key(text)
+    cached = summary_cache.get_final(doc_key, style)
+    if cached is not None:
+        return cached
 
-    # Map-reduce for long documents
-    chunks = [text[i: i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
-    chunk_summaries = []
-    for chunk in chunks:
-        prompt = MAP_CHUNK_SUMMARY_PROMPT_TEMPLATE.format(text=chunk)
-        chunk_summaries.append(service.generate_text(prompt))
+    summary = llm_service.generate_text(_final_prompt(text, style, doc_key))
+    summary_cache.set_final(doc_key, style, summary)
+    return summary
 
-    combined = "\n\n---\n\n".join(chunk_summaries)
-    final_prompt = REDUCE_SUMMARY_COMBINE_PROMPT_TEMPLATE.format(
-        summaries=combined, style=style_desc
-    )
-    return service.generate_text(final_prompt)
\ No newline at end of file
+
+async def astream_summary(text: str, style: str = "detailed") -> AsyncIterator[str]:
+    """
+    Streaming variant of `get_summary`. The map phase of long documents runs
+    to completion first; the final summary is yielded token by token.
+    A cached summary is yielded whole.
+    """
+    style = style if style in _STYLE_INSTRUCTIONS else "detailed"
+
+    text = text.strip()
+    if not text:
+        yield "No text provided for summarization."
+        return
+
+    doc_key = summary_cache.key(text)
+    cached = await run_in_threadpool(summary_cache.get_final, doc_key, style)
+    if cached is not None:
+        yield cached
+        return
+
+    prompt = await run_in_threadpool(_final_prompt, text, style, doc_key)
+    tokens = []
+    async for token in llm_service.astream_text(prompt):
+        tokens.append(token)
+        yield token
+    summary = "".join(tokens).strip()
+    if summary:
+        await run_in_threadpool(summary_cache.set_final, doc_key, style, summary)
@@ -0,0 +1,123 @@
+# services/warmup_service.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_pipeline():
+    from src.services.rag_service import rag_pipeline
+
+    rag_pipeline.warmup()
+
+
+def _warm_vector_store():
+    from src.db.vector_store import get_vector_store
+
+    get_vector_store().initialize()
+
+
+def _warm_local_stores():
+    from src.db.summary_cache import summary_cache
+    from src.services.rag_service import rag_pipeline
+
+    # SQLite stores are created and opened on first access
+    summary_cache.db
+    rag_pipeline.bm25_index
+
+
+def _warm_llm_clients():
+    from src.services.llm_service import llm_service
+
+    # The clients are created on first access
+    llm_service.client
+    llm_service.async_client
+
+
+# (name, function, required): a failed required step keeps the service unready;
+# remote services are only reported, so startup never depends on the network
+_STEPS: List[Tuple[str, Callable[[], None], bool]] = [
+    ("embedding_model", _warm_pipeline, True),
+    ("local_stores", _warm_local_stores, False),
+    ("llm_clients", _warm_llm_clients, False),
+    ("vector_store", _warm_vector_store, False),
+]
+
+
+class WarmupService:
+    """
+    Loads heavy resources in a background thread after startup (Singleton).
+
+    The server accepts connections immediately; /readyz answers 503 until the
+    required steps are done, so a load balancer only routes queries to warm
+    workers. With WARMUP_ENABLED off the service is ready at once and
+    everything loads on first use.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(WarmupService, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._thread = None
+            cls._instance._state = "pending"
+            cls._instance._steps = {}
+            cls._instance._seconds = None
+        return cls._instance
+
+    def start(self):
+        """Start warming up in the background; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None or self._state != "pending":
+                return
+            if not settings.WARMUP_ENABLED:
+                self._state = "ready"
+                return
+            self._state = "warming"
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.perf_counter()
+        ready = True
+        for name, step, required in _STEPS:
+            step_started = time.perf_counter()
+            try:
+                step()
+                error: Optional[str] = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if required:
+                    ready = False
+                    logger.error("Warmup step %s failed: %s", name, error)
+                else:
+                    logger.warning("Warmup step %s failed: %s", name, error)
+            with self._lock:
+                self._steps[name] = {
+                    "ok": error is None,
+                    "required": required,
+                    "seconds": round(time.perf_counter() - step_started, 3),
+                    "error": error,
+                }
+        with self._lock:
+            self._seconds = round(time.perf_counter() - started, 3)
+            self._state = "ready" if ready else "failed"
+        logger.info("Warmup finished in %.1fs (%s)", self._seconds, self._state)
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self._state,
+                "seconds": self._seconds,
+                "steps": {name: dict(step) for name, step in self._steps.items()},
+            }
+
+
+warmup_service = WarmupService()
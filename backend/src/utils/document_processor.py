@@ -1,50 +1,160 @@
-import fitz  # PyMuPDF
-import uuid
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone
 from src.config import settings
+from src.utils.embedding_batcher import BatchingEmbedder
+from src.utils.embedding_backend import get_embedding_backend
+from src.utils.cache import LRUTTLCache
+from src.db.vector_store import get_vector_store
+from src.db.upsert import ConcurrentUpserter
+from src.utils.hashing import chunk_id, sha256_file
+from src.utils.fusion import reciprocal_rank_fusion
+from src.utils.reranker import CrossEncoderReranker
+from src.db.bm25_index import BM25Index, get_bm25_index
+from src.db.embedding_cache import get_embedding_cache
+from src.utils.streaming import background_iter
+from src.utils.pdf_loader import ParallelPdfLoader
+from src.core.metrics import CHUNKS, stage
+from src.utils.token_budget import count_tokens
 from src.core.exceptions import (
     DocumentFolderNotFoundException,
     DocumentProcessingException,
     NoChunksToEmbedException,
     EmbeddingModelException,
     PineconeQueryException,
-    PineconeUpsertException
+    PineconeUpsertException,
+    PineconeDeleteException
 )
-from pdf2image import convert_from_path
-from pdf2image.exceptions import PDFInfoNotInstalledError
-import pytesseract
-from langchain_community.document_loaders.image import UnstructuredImageLoader
+
+logger = logging.getLogger(__name__)
 
 pinecone_namespace = settings.PINECONE_NAMESPACE 
-pinecone_index_name = settings.PINECONE_INDEX_NAME 
-pinecone_api_key = settings.PINECONE_API_KEY
 PINECONE_BATCH_SIZE = int(settings.PINECONE_BATCH_SIZE) if settings.PINECONE_BATCH_SIZE else 100
+INGEST_EMBED_BATCH_SIZE = settings.INGEST_EMBED_BATCH_SIZE
+INGEST_QUEUE_SIZE = settings.INGEST_QUEUE_SIZE
+
+# Bounded pool for CPU-bound query encoding so async routes never run it on the event loop
+_embedding_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_MAX_WORKERS,
+    thread_name_prefix="embedding",
+)
+# Runs keyword searches of blocking retrievals while the dense search proceeds
+_keyword_search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bm25")
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as a cache key (e5 is uncased)."""
+    return " ".join(query.casefold().split())
+
+
+def _copy_docs(docs: List[Document]) -> List[Document]:
+    return [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in docs]
 
 
 class RagPipeline:
+    """
+    Loading, chunking, embedding, indexing and retrieval of documents.
+
+    Constructing a pipeline is cheap: the embedding model is shared by all
+    instances and loaded on first use (or by `warmup` at startup).
+    """
     _embedding_model = None  # Class-level cache
+    _embedding_batcher = None  # Shared micro-batcher for query embeddings
+    _model_lock = threading.Lock()
+    _reranker = None  # Shared cross-encoder, created when RERANK_ENABLED
+    # Shared across instances so /upload pipelines can invalidate what /query cached
+    _query_embedding_cache = LRUTTLCache(
+        settings.QUERY_CACHE_MAX_SIZE, settings.QUERY_CACHE_TTL_SECONDS, name="query_embedding"
+    )
+    _retrieval_cache = LRUTTLCache(settings.QUERY_CACHE_MAX_SIZE, settings.QUERY_CACHE_TTL_SECONDS, name="retrieval")
     
     def __init__(self):
-        print("Initializing RagPipeline...")
-        # Use cached model if available
-        if RagPipeline._embedding_model is None:
-            print("Loading embedding model for the first time...")
-            RagPipeline._embedding_model = SentenceTransformer('intfloat/e5-base-v2')
-        else:
-            print("Using cached embedding model")
-        
-        self.embedding_model = RagPipeline._embedding_model
-        
-        # Initialize Pinecone
-        pc = Pinecone(api_key=pinecone_api_key)
-        self.index = pc.Index(pinecone_index_name)
-        
-        print("RagPipeline initialized successfully")
+        # Vector store backend (Pinecone or local) selected by VECTOR_STORE_BACKEND
+        self.vector_store = get_vector_store()
+        if settings.RERANK_ENABLED and RagPipeline._reranker is None:
+            RagPipeline._reranker = CrossEncoderReranker()
+        self.reranker = RagPipeline._reranker
+
+    @property
+    def bm25_index(self) -> Optional[BM25Index]:
+        """Keyword index searched alongside the vector store (None when hybrid search is off), opened on first use."""
+        return get_bm25_index(pinecone_namespace) if settings.HYBRID_SEARCH_ENABLED else None
+
+    @classmethod
+    def load_embedding_model(cls):
+        """Load the shared embedding model and its query micro-batcher once (thread-safe)."""
+        if cls._embedding_batcher is None:
+            with cls._model_lock:
+                if cls._embedding_batcher is None:
+                    logger.info("Loading embedding model (%s backend)", settings.EMBEDDING_BACKEND)
+                    with stage("model_load"):
+                        cls._embedding_model = get_embedding_backend()
+                    cls._embedding_batcher = BatchingEmbedder(
+                        cls._embedding_model,
+                        _embedding_executor,
+                        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+                    )
+        return cls._embedding_model
+
+    @classmethod
+    def embedding_model_loaded(cls) -> bool:
+        return cls._embedding_batcher is not None
+
+    @property
+    def embedding_model(self):
+        return self.load_embedding_model()
+
+    @property
+    def embedding_batcher(self) -> BatchingEmbedder:
+        self.load_embedding_model()
+        return RagPipeline._embedding_batcher
+
+    def warmup(self):
+        """
+        Load the embedding model, reranker and tokenizer and run one encode
+        through each, so the first request does not pay for lazy loading
+        and first-call kernel setup.
+        """
+        self.embedding_model.encode(["warmup"], normalize_embeddings=True, show_progress_bar=False)
+        if self.reranker is not None:
+            self.reranker.model.predict([("warmup", "warmup")])
+        count_tokens("warmup")
+
+    def iter_pages(self, folder_path: str, strict: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the pages of the PDF documents in a folder, one file at a time.
+        Files are extracted in parallel on the PDF loader process pool and
+        yielded in a deterministic (sorted path) order. Same page dicts and
+        `strict` semantics as `load_documents`, except that an empty result is
+        not an error. Per-file timing and failures end up in `self.load_report`.
+        """
+        logger.info("Loading documents from folder: %s", folder_path)
+        folder = Path(folder_path)
+        if not folder.is_dir():
+            raise DocumentFolderNotFoundException(folder_path)
+
+        loader = ParallelPdfLoader()
+        try:
+            for file, file_pages, error in loader.iter_files(sorted(folder.rglob("*.pdf"))):
+                logger.debug("Processed file: %s", file.name)
+                if error:
+                    msg = f"Error reading {file.name}: {error}"
+                    if strict:
+                        raise DocumentProcessingException(msg)
+                    logger.warning(msg)
+                    continue
+                yield from file_pages
+        finally:
+            self.load_report = loader.report
+            for entry in loader.slowest(3):
+                logger.info("PDF load: %s %d pages in %ss", entry['filename'], entry['pages'], entry['cpu_seconds'])
 
     def load_documents(self, folder_path: str, strict: bool = True) -> List[Dict[str, Any]]:
         """
@@ -57,55 +167,17 @@ class RagPipeline:
         Returns:
             List[Dict[str, Any]]: List of document entries with page content.
         """
-        print(f"Loading documents from folder: {folder_path}")
-        folder = Path(folder_path)
-        if not folder.is_dir():
-            raise DocumentFolderNotFoundException(folder_path)
-
-        pages = []
-
-        for file in folder.rglob("*.pdf"):
-            print(f"Processing file: {file.name}")
-            try:
-                with fitz.open(file) as doc:
-                    for page_idx, page in enumerate(doc):
-                        text = page.get_text("text").strip()
-                        if not text:
-                            # OCR fallback for image-only pages
-                            try:
-                                images = convert_from_path(
-                                    str(file),
-                                    first_page=page_idx + 1,
-                                    last_page=page_idx + 1,
-                                    poppler_path=POPPLER_PATH,
-                                )
-                            except PDFInfoNotInstalledError as e:
-                                raise DocumentProcessingException(
-                                    "Poppler is required for OCR. Install Poppler and set POPPLER_PATH to its bin directory."
-                                ) from e
-                            if images:
-                                text = pytesseract.image_to_string(images[0]).strip()
-                        if not text:
-                            continue
-                        pages.append({
-                            "page_content": text,
-                            "filename": file.name,
-                            "page_number": page_idx + 1,
-                            "file_path": str(file)
-                        })
-            except Exception as e:
-                msg = f"Error reading {file.name}: {e}"
-                if strict:
-                    raise
-                print(msg)
-                continue
+        pages = list(self.iter_pages(folder_path, strict=strict))
         if not pages and strict:
             raise DocumentFolderNotFoundException(f"No readable PDF pages in {folder_path}")
-        print(f"Loaded {len(pages)} pages from {len(list(folder.rglob('*.pdf')))} PDF files")
+        logger.info("Loaded %d pages from %s", len(pages), folder_path)
         return pages
 
     def load_images(self, folder_path: str, strict: bool = True) -> List[Dict[str, Any]]:
         """Load text from image files using Unstructured."""
+        # Unstructured pulls in a large dependency tree; only image ingestion needs it
+        from langchain_community.document_loaders.image import UnstructuredImageLoader
+
         folder = Path(folder_path)
         if not folder.is_dir():
             raise DocumentFolderNotFoundException(folder_path)
@@ -130,49 +202,77 @@ class RagPipeline:
             except Exception as e:
                 if strict:
                     raise
-                print(f"Error reading {img.name}: {e}")
+                logger.warning("Error reading %s: %s", img.name, e)
         return pages
 
-    def split_chunks(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Split PDF pages into smaller chunks.
-        
-        Args:
-            pages: List of page dictionaries with 'page_content'
-            
-        Returns:
-            List of chunk dictionaries with text and metadata
-        """
-        print(f"Splitting {len(pages)} pages into chunks...")
-        text_splitter = RecursiveCharacterTextSplitter(
+    def _text_splitter(self) -> RecursiveCharacterTextSplitter:
+        return RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
             is_separator_regex=False,
         )
-        chunks = []
+
+    def iter_chunks(self, pages: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Stream chunk dictionaries for a stream of pages."""
+        text_splitter = self._text_splitter()
         for doc in pages:
             if not doc.get("page_content") or not doc["page_content"].strip():
                 continue
             
-            split_docs = text_splitter.create_documents(
-                [doc["page_content"]], 
-                metadatas=[{
-                    "filename": doc["filename"], 
-                    "page_number": doc["page_number"],
-                    "file_path": doc.get("file_path", "")
-                }]
-            )
+            with stage("split"):
+                split_docs = text_splitter.create_documents(
+                    [doc["page_content"]], 
+                    metadatas=[{
+                        "filename": doc["filename"], 
+                        "page_number": doc["page_number"],
+                        "file_path": doc.get("file_path", "")
+                    }]
+                )
+            CHUNKS.labels("split").inc(len(split_docs))
             
             for split_doc in split_docs:
-                chunks.append({
+                yield {
                     "chunk_text": split_doc.page_content,
                     "metadata": split_doc.metadata
-                })
-        print(f"Created {len(chunks)} chunks")
+                }
+
+    def split_chunks(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Split PDF pages into smaller chunks.
+        
+        Args:
+            pages: List of page dictionaries with 'page_content'
+            
+        Returns:
+            List of chunk dictionaries with text and metadata
+        """
+        chunks = list(self.iter_chunks(pages))
+        logger.info("Split %d pages into %d chunks", len(pages), len(chunks))
+        return chunks
+
+    def assign_chunk_ids(self, chunks: List[Dict[str, Any]],
+                         file_hashes: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Set a deterministic 'id' on every chunk: a hash of its file's content hash,
+        page and text. `file_hashes` maps filenames to content hashes; hashes it
+        lacks are computed from the chunk's 'file_path' and added to it.
+        """
+        file_hashes = {} if file_hashes is None else file_hashes
+        for chunk in chunks:
+            metadata = chunk.get("metadata", {})
+            filename = metadata.get("filename", "")
+            if filename not in file_hashes:
+                file_path = metadata.get("file_path")
+                file_hashes[filename] = sha256_file(file_path) if file_path else ""
+            chunk["id"] = chunk_id(
+                file_hashes[filename],
+                metadata.get("page_number", 0),
+                str(chunk.get("chunk_text", "")).strip(),
+            )
         return chunks
 
-    def create_embeddings(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def create_embeddings(self, data: List[Dict[str, Any]], show_progress_bar: bool = True) -> List[Dict[str, Any]]:
         """
         Create text embeddings from PDF chunks.
         Each item must contain 'chunk_text' field.
@@ -180,7 +280,6 @@ class RagPipeline:
         Returns:
             List[Dict[str, Any]]: Each entry contains id, embedding vector, metadata, and text.
         """
-        print(f"Creating embeddings for {len(data)} chunks...")
         if not data:
             raise NoChunksToEmbedException()
   
@@ -195,27 +294,17 @@ class RagPipeline:
             input_texts.append(text)
         if not input_texts:
             raise NoChunksToEmbedException()
+        self.assign_chunk_ids([item for item in valid_items if not item.get("id")])
         
-        print(f"Processing {len(input_texts)} valid text chunks...")
-        try:
-            embeddings = self.embedding_model.encode(
-                input_texts,
-                normalize_embeddings=True,
-                show_progress_bar=True,
-                batch_size=32
-            )
-            if hasattr(embeddings, "tolist"):
-                embeddings = embeddings.tolist()
-        except Exception as e:
-            raise EmbeddingModelException(f"Embedding model error: {e}")
+        logger.debug("Creating embeddings for %d of %d chunks", len(input_texts), len(data))
+        embeddings = self._encode_with_cache(input_texts, show_progress_bar)
 
         # Construct final structured results
         results = []
-        for i, (item, embedding, text_content) in enumerate(zip(valid_items, embeddings, input_texts)):
-            chunk_id = str(uuid.uuid4())
-            
+        for item, embedding, text_content in zip(valid_items, embeddings, input_texts):
             metadata_info = item.get("metadata", {})
-                
+            vector_id = item["id"]
+
             metadata = {
                 "filename": metadata_info.get("filename", ""),
                 "page_number": metadata_info.get("page_number", 0),
@@ -224,77 +313,452 @@ class RagPipeline:
             }
 
             results.append({
-                "id": chunk_id,
+                "id": vector_id,
                 "values": embedding,
                 "metadata": metadata,
                 "text": text_content
             })
 
-        print(f"Successfully created {len(results)} embeddings")
         return results
 
+    def _encode_with_cache(self, texts: List[str], show_progress_bar: bool) -> List[List[float]]:
+        """
+        Encode passages, serving repeated texts from the persistent embedding
+        cache and sending only the misses to the model.
+        """
+        cache = get_embedding_cache() if settings.EMBEDDING_CACHE_ENABLED else None
+        keys = [cache.key(text) for text in texts] if cache else []
+        cached = cache.get_many(keys) if cache else {}
+
+        # Encode each distinct missing text once
+        missing: Dict[str, str] = {}
+        for i, text in enumerate(texts):
+            key = keys[i] if cache else str(i)
+            if key not in cached:
+                missing.setdefault(key, text)
+        if cache and len(missing) < len(texts):
+            logger.debug("Embedding cache: %d of %d chunks cached", len(texts) - len(missing), len(texts))
+
+        encoded: Dict[str, List[float]] = {}
+        if missing:
+            try:
+                with stage("embed"):
+                    embeddings = self.embedding_model.encode(
+                        list(missing.values()),
+                        normalize_embeddings=True,
+                        show_progress_bar=show_progress_bar,
+                        batch_size=32
+                    )
+                if hasattr(embeddings, "tolist"):
+                    embeddings = embeddings.tolist()
+            except Exception as e:
+                raise EmbeddingModelException(f"Embedding model error: {e}")
+            CHUNKS.labels("embedded").inc(len(missing))
+            encoded = dict(zip(missing.keys(), embeddings))
+            if cache:
+                cache.set_many(encoded)
+
+        cached.update(encoded)
+        return [cached[keys[i] if cache else str(i)] for i in range(len(texts))]
+
+    def _upserter(self, on_stored: Optional[Callable[[int], None]] = None) -> ConcurrentUpserter:
+        def on_batch_done(batch: List[Dict[str, Any]]):
+            # Only stored vectors enter the keyword index, keeping both retrievers in sync
+            if self.bm25_index is not None:
+                self.bm25_index.add(batch)
+            self.invalidate_retrieval_cache(pinecone_namespace)
+            if on_stored is not None:
+                on_stored(len(batch))
+
+        return ConcurrentUpserter(
+            self.vector_store,
+            pinecone_namespace,
+            max_batch_size=PINECONE_BATCH_SIZE,
+            on_batch_done=on_batch_done,
+        )
+
+    @staticmethod
+    def _keyword_record(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword index record of a chunk, shaped like a stored vector without values."""
+        metadata = chunk.get("metadata", {})
+        return {
+            "id": chunk["id"],
+            "metadata": {
+                "filename": metadata.get("filename", ""),
+                "page_number": metadata.get("page_number", 0),
+                "file_path": metadata.get("file_path", ""),
+                "text": str(chunk.get("chunk_text", "")).strip(),
+            },
+        }
+
+    @staticmethod
+    def _to_vectors(embed_docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {"id": doc["id"], "values": doc["values"], "metadata": doc["metadata"]}
+            for doc in embed_docs
+        ]
+
     def add_embeddings_to_pinecone(self, embed_docs: List[Dict[str, Any]]) -> int:
-        print(f"Adding {len(embed_docs)} embeddings to Pinecone...")
+        """
+        Upsert embeddings with several size-bounded batches in flight and per-batch retries.
+        Raises PineconeUpsertException if any batch still fails after retries; the
+        partial-progress report is kept in `self.last_upsert_report`.
+        """
         if not embed_docs:
             return 0
-        total_vectors_added = 0
-        for i in range(0, len(embed_docs), PINECONE_BATCH_SIZE):
-            batch = embed_docs[i : i + PINECONE_BATCH_SIZE]
-            print(f"Processing batch {i // PINECONE_BATCH_SIZE + 1}...")
-            vectors_to_upsert = []
-            for doc in batch:
-                vectors_to_upsert.append({
-                    "id": doc["id"],
-                    "values": doc["values"],
-                    "metadata": doc["metadata"]
-                })
-            try:
-                self.index.upsert(vectors=vectors_to_upsert, namespace=pinecone_namespace)
-                total_vectors_added += len(vectors_to_upsert)
-            except Exception as e:
-                raise PineconeUpsertException(str(e))
-        print(f"Successfully added {total_vectors_added} vectors to Pinecone")
-        return total_vectors_added
+        with self._upserter() as upserter:
+            upserter.add(self._to_vectors(embed_docs))
+        report = self.last_upsert_report = upserter.report
+        if report["batches_failed"]:
+            raise PineconeUpsertException(
+                f"Upserted {report['vectors_upserted']}/{len(embed_docs)} vectors; "
+                f"{report['batches_failed']} batches failed: {report['errors'][0]}"
+            )
+        logger.info("Added %d vectors to the vector store", report['vectors_upserted'])
+        return report["vectors_upserted"]
 
-    def retrieve_relevant_chunks(self, query: str, top_k: int = 5, min_score: float = 0.5):
+    def ingest_stream(
+        self,
+        folder_path: str,
+        strict: bool = False,
+        is_indexed: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        progress: Optional[Callable[[str, int], None]] = None,
+        file_hashes: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
         """
-        Retrieve relevant PDF chunks based on query.
-        Returns a list of documents and highest scored file_path (if any).
+        Load, split, embed and upsert a folder of PDFs as overlapping streaming stages.
+
+        Pages stream into the chunker, chunks are grouped into batches of
+        INGEST_EMBED_BATCH_SIZE for embedding, and embedded batches stream into
+        the concurrent upserter. Stages run in their own threads connected by queues
+        of INGEST_QUEUE_SIZE batches, so memory stays flat regardless of corpus size.
+        Chunks for which `is_indexed(chunk)` is true are not embedded again;
+        they are only added to the keyword index if it lacks them.
+        Upsert failures do not abort the stream; they are reported instead.
+        `progress`, if given, is called with ('pages_loaded' | 'chunks' |
+        'vectors_stored', increment) from the stage threads. `file_hashes`
+        (filename -> content hash) saves rehashing files the caller already hashed.
+
+        Returns:
+            Dict with pages, chunks and vectors_stored counters, the ids of every
+            chunk produced per filename under 'chunk_ids', and the upsert report
+            (including 'failed_ids') under 'upsert'.
         """
-        print(f"Retrieving relevant chunks for query: '{query}' (top_k={top_k}, min_score={min_score})")
+        stats = {"pages": 0, "chunks": 0, "vectors_stored": 0, "chunk_ids": {}, "upsert": {}}
+        report = progress or (lambda counter, increment: None)
+        file_hashes = dict(file_hashes or {})
+
+        def counted_pages():
+            for page in self.iter_pages(folder_path, strict=strict):
+                stats["pages"] += 1
+                report("pages_loaded", 1)
+                yield page
+
+        def chunk_batches():
+            seen = set()
+            batch = []
+            backfill = []
+            for chunk in self.iter_chunks(counted_pages()):
+                self.assign_chunk_ids([chunk], file_hashes)
+                stats["chunks"] += 1
+                report("chunks", 1)
+                stats["chunk_ids"].setdefault(chunk["metadata"]["filename"], set()).add(chunk["id"])
+                if chunk["id"] in seen:
+                    continue
+                seen.add(chunk["id"])
+                if is_indexed and is_indexed(chunk):
+                    if self.bm25_index is not None:
+                        backfill.append(self._keyword_record(chunk))
+                        if len(backfill) >= INGEST_EMBED_BATCH_SIZE:
+                            self.bm25_index.add(backfill)
+                            backfill = []
+                    continue
+                batch.append(chunk)
+                if len(batch) >= INGEST_EMBED_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if backfill:
+                self.bm25_index.add(backfill)
+            if batch:
+                yield batch
+
+        def embedded_batches():
+            for batch in background_iter(chunk_batches(), INGEST_QUEUE_SIZE, name="ingest-chunk"):
+                yield self.create_embeddings(batch, show_progress_bar=False)
+
+        with self._upserter(on_stored=lambda stored: report("vectors_stored", stored)) as upserter:
+            for embedded in background_iter(embedded_batches(), INGEST_QUEUE_SIZE, name="ingest-embed"):
+                upserter.add(self._to_vectors(embedded))
+        stats["upsert"] = upserter.report
+        stats["vectors_stored"] = upserter.report["vectors_upserted"]
+
+        logger.info(
+            "Streamed %d pages, %d chunks, %d vectors stored",
+            stats['pages'], stats['chunks'], stats['vectors_stored'],
+        )
+        return stats
+
+    def delete_embeddings(self, ids: List[str]) -> int:
+        """Delete vectors by id from the vector store namespace."""
+        ids = list(ids)
+        if not ids:
+            return 0
+        logger.info("Deleting %d stale vectors", len(ids))
         try:
-            print("Creating query embedding...")
-            query_emb = self.embedding_model.encode(query, normalize_embeddings=True).tolist()
-            results = self.index.query(
+            with stage("delete"):
+                for i in range(0, len(ids), PINECONE_BATCH_SIZE):
+                    self.vector_store.delete(ids[i : i + PINECONE_BATCH_SIZE], namespace=pinecone_namespace)
+                if self.bm25_index is not None:
+                    self.bm25_index.delete(ids)
+            CHUNKS.labels("deleted").inc(len(ids))
+        except Exception as e:
+            raise PineconeDeleteException(str(e))
+        finally:
+            self.invalidate_retrieval_cache(pinecone_namespace)
+        return len(ids)
+
+    @classmethod
+    def invalidate_retrieval_cache(cls, namespace) -> int:
+        """Drop cached retrieval results for `namespace` after its vectors change."""
+        return cls._retrieval_cache.invalidate(lambda key: key[3] == namespace)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        stats = {
+            "query_embedding_cache": cls._query_embedding_cache.stats(),
+            "retrieval_cache": cls._retrieval_cache.stats(),
+        }
+        if cls._reranker is not None:
+            stats["reranker"] = cls._reranker.stats()
+        if settings.EMBEDDING_CACHE_ENABLED:
+            stats["embedding_cache"] = get_embedding_cache().stats()
+        return stats
+
+    def embed_query(self, query: str) -> List[float]:
+        """Encode a single query into a normalized embedding vector."""
+        key = normalize_query(query)
+        query_emb = self._query_embedding_cache.get(key)
+        if query_emb is None:
+            with stage("embed_query"):
+                query_emb = self.embedding_batcher.submit(query).result()
+            self._query_embedding_cache.set(key, query_emb)
+        return query_emb
+
+    async def aembed_query(self, query: str) -> List[float]:
+        """Async variant of `embed_query`; batched with other in-flight queries."""
+        key = normalize_query(query)
+        query_emb = self._query_embedding_cache.get(key)
+        if query_emb is None:
+            with stage("embed_query"):
+                query_emb = await asyncio.wrap_future(self.embedding_batcher.submit(query))
+            self._query_embedding_cache.set(key, query_emb)
+        return query_emb
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Encode many queries with a single `encode` call on the embedding executor,
+        bypassing the micro-batcher. Cached embeddings are reused and new ones cached.
+        """
+        keys = [normalize_query(query) for query in queries]
+        embeddings: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            if key in embeddings or key in missing:
+                continue
+            cached = self._query_embedding_cache.get(key)
+            if cached is None:
+                missing[key] = query
+            else:
+                embeddings[key] = cached
+        if missing:
+            model = self.embedding_model
+            with stage("embed_query_batch"):
+                encoded = await asyncio.wrap_future(_embedding_executor.submit(
+                    model.encode,
+                    list(missing.values()),
+                    normalize_embeddings=True,
+                    batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                    show_progress_bar=False,
+                ))
+            for key, embedding in zip(missing, encoded):
+                embeddings[key] = embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
+                self._query_embedding_cache.set(key, embeddings[key])
+        return [embeddings[key] for key in keys]
+
+    def _dense_matches(self, query_emb: List[float], top_k: int, min_score: float) -> List[Dict[str, Any]]:
+        """Vector store matches with text and a score of at least `min_score`, best first."""
+        with stage("vector_query"):
+            matches = self.vector_store.query(
                 vector=query_emb,
                 top_k=top_k,
                 namespace=pinecone_namespace,
                 include_metadata=True
             )
-            
-            docs = []
-            highest_score = float("-inf")
-            highest_url = None
-
-            for match in results.get('matches', []):
-                score = match.get('score', 0)
-                metadata = match.get('metadata', {}) or {}
-                text = metadata.get('text', '')
-                if score >= min_score and text:
-                    doc = Document(
-                        page_content=text,
-                        metadata={
-                            'filename': metadata.get('filename', ''),
-                            'page_number': metadata.get('page_number', 0),
-                            'file_path': metadata.get('file_path', ''),
-                            'score': score
-                        }
-                    )
-                    docs.append(doc)
-                    if score > highest_score:
-                        highest_score = score
-                        highest_url = metadata.get('file_path', '')
-            print(f"Found {len(docs)} relevant chunks")
-            return docs, highest_url
+        return [
+            match for match in matches
+            if match.get('score', 0) >= min_score and (match.get('metadata') or {}).get('text')
+        ]
+
+    def _keyword_matches(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        with stage("keyword_query"):
+            return self.bm25_index.search(query, top_k=top_k, min_term_match=settings.BM25_MIN_TERM_MATCH)
+
+    @staticmethod
+    def _to_doc(match: Dict[str, Any], **scores) -> Document:
+        metadata = match.get('metadata', {}) or {}
+        return Document(
+            page_content=metadata.get('text', ''),
+            metadata={
+                'id': match.get('id', ''),
+                'filename': metadata.get('filename', ''),
+                'page_number': metadata.get('page_number', 0),
+                'file_path': metadata.get('file_path', ''),
+                **scores,
+            }
+        )
+
+    def query_index(self, query_emb: List[float], top_k: int = 5, min_score: float = 0.5):
+        """
+        Query the vector store with a precomputed embedding.
+        Returns a list of documents and highest scored file_path (if any).
+        """
+        docs = [
+            self._to_doc(match, score=match.get('score', 0))
+            for match in self._dense_matches(query_emb, top_k, min_score)
+        ]
+        highest_url = docs[0].metadata['file_path'] if docs else None
+        logger.debug("Found %d relevant chunks", len(docs))
+        return docs, highest_url
+
+    def _fuse(self, dense: List[Dict[str, Any]], keyword: List[Dict[str, Any]], top_k: int):
+        """
+        Combine dense and keyword matches with reciprocal rank fusion.
+        Each document keeps its cosine 'score' (0 if only the keyword search found it)
+        and 'bm25_score', plus 'relevance': its fused score relative to the best one.
+        Keyword-only matches must reach BM25_MIN_KEYWORD_SCORE, since they were
+        never held to `min_score`.
+        """
+        dense_ids = {match['id'] for match in dense}
+        keyword = [
+            match for match in keyword
+            if match['id'] in dense_ids or match.get('normalized_score', 0.0) >= settings.BM25_MIN_KEYWORD_SCORE
+        ]
+        fused = reciprocal_rank_fusion(
+            [[match['id'] for match in dense], [match['id'] for match in keyword]],
+            k=settings.RRF_K,
+        )
+        dense_by_id = {match['id']: match for match in dense}
+        keyword_by_id = {match['id']: match for match in keyword}
+        ranked = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+        docs = []
+        for match_id in ranked:
+            dense_match = dense_by_id.get(match_id)
+            keyword_match = keyword_by_id.get(match_id)
+            docs.append(self._to_doc(
+                dense_match or keyword_match,
+                score=dense_match.get('score', 0) if dense_match else 0.0,
+                bm25_score=keyword_match['score'] if keyword_match else 0.0,
+                relevance=fused[match_id] / fused[ranked[0]],
+            ))
+        highest_url = docs[0].metadata['file_path'] if docs else None
+        logger.debug(
+            "Found %d relevant chunks (%d dense and %d keyword candidates)", len(docs), len(dense), len(keyword)
+        )
+        return docs, highest_url
+
+    def _fetch_k(self, top_k: int) -> int:
+        """Candidates to retrieve: over-fetched for the reranker to choose from."""
+        return max(top_k, settings.RERANK_CANDIDATES) if self.reranker is not None else top_k
+
+    def _cached_retrieval(self, cache_key: tuple):
+        cached = self._retrieval_cache.get(cache_key)
+        if cached is None:
+            return None
+        docs, highest_url = cached
+        return _copy_docs(docs), highest_url
+
+    def _rerank_and_cache(self, query: str, cache_key: tuple, docs: List[Document], top_k: int):
+        """
+        Final step shared by both retrieval paths: rerank the candidates when
+        reranking is on and store the result in the retrieval cache. Results the
+        reranker could not fully score (budget, timeout, busy) are not cached,
+        so the next call reranks again with the scores cached meanwhile.
+        """
+        complete = True
+        if self.reranker is not None:
+            docs, complete = self.reranker.rerank(query, cache_key[0], docs, top_k)
+        highest_url = docs[0].metadata['file_path'] if docs else None
+        if complete:
+            self._retrieval_cache.set(cache_key, (_copy_docs(docs), highest_url))
+        return docs, highest_url
+
+    def retrieve_relevant_chunks(self, query: str, top_k: int = 5, min_score: float = 0.5):
+        """
+        Retrieve relevant PDF chunks based on query.
+        With hybrid search on, the keyword index is searched in parallel with the
+        vector store and both candidate lists are fused by reciprocal rank.
+        With reranking on, RERANK_CANDIDATES are retrieved and the cross-encoder
+        keeps the best `top_k`.
+        Returns a list of documents and highest scored file_path (if any).
+        """
+        logger.debug("Retrieving relevant chunks for query: %r (top_k=%d, min_score=%s)", query, top_k, min_score)
+        cache_key = (normalize_query(query), top_k, min_score, pinecone_namespace)
+        cached = self._cached_retrieval(cache_key)
+        if cached is not None:
+            return cached
+        fetch_k = self._fetch_k(top_k)
+        try:
+            if self.bm25_index is None:
+                query_emb = self.embed_query(query)
+                docs, _ = self.query_index(query_emb, top_k=fetch_k, min_score=min_score)
+            else:
+                candidates = fetch_k * settings.HYBRID_CANDIDATE_MULTIPLIER
+                # Run in a copy of this context so the search shows up in the request's timings
+                keyword_future = _keyword_search_executor.submit(
+                    contextvars.copy_context().run, self._keyword_matches, query, candidates
+                )
+                query_emb = self.embed_query(query)
+                dense = self._dense_matches(query_emb, candidates, min_score)
+                docs, _ = self._fuse(dense, keyword_future.result(), fetch_k)
+            return self._rerank_and_cache(query, cache_key, docs, top_k)
+        except Exception as e:
+            raise PineconeQueryException(str(e))
+
+    async def _adense_matches(self, query: str, top_k: int, min_score: float,
+                              query_emb: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        if query_emb is None:
+            query_emb = await self.aembed_query(query)
+        return await asyncio.to_thread(self._dense_matches, query_emb, top_k, min_score)
+
+    async def aretrieve_relevant_chunks(self, query: str, top_k: int = 5, min_score: float = 0.5,
+                                        query_emb: Optional[List[float]] = None):
+        """
+        Async variant of `retrieve_relevant_chunks`.
+        Encoding is micro-batched on the bounded embedding executor and the
+        blocking Pinecone query runs in a worker thread, keeping the event loop free.
+        A precomputed `query_emb` (e.g. from `aembed_queries`) skips the encoding.
+        """
+        logger.debug("Retrieving relevant chunks for query: %r (top_k=%d, min_score=%s)", query, top_k, min_score)
+        cache_key = (normalize_query(query), top_k, min_score, pinecone_namespace)
+        cached = self._cached_retrieval(cache_key)
+        if cached is not None:
+            return cached
+        fetch_k = self._fetch_k(top_k)
+        try:
+            if self.bm25_index is None:
+                if query_emb is None:
+                    query_emb = await self.aembed_query(query)
+                docs, _ = await asyncio.to_thread(self.query_index, query_emb, fetch_k, min_score)
+            else:
+                candidates = fetch_k * settings.HYBRID_CANDIDATE_MULTIPLIER
+                dense, keyword = await asyncio.gather(
+                    self._adense_matches(query, candidates, min_score, query_emb),
+                    asyncio.to_thread(self._keyword_matches, query, candidates),
+                )
+                docs, _ = self._fuse(dense, keyword, fetch_k)
+            if self.reranker is None:
+                return self._rerank_and_cache(query, cache_key, docs, top_k)
+            return await asyncio.to_thread(self._rerank_and_cache, query, cache_key, docs, top_k)
         except Exception as e:
-            raise PineconeQueryException(str(e))
\ No newline at end of file
+            raise PineconeQueryException(str(e))
@@ -0,0 +1,153 @@
+"""
+Embedding backends behind a SentenceTransformer-style `encode`.
+
+- torch: the SentenceTransformer model in full precision (default).
+- onnx:  an ONNX Runtime session over an export of the same model, typically
+         dynamically int8-quantized with scripts/onnx_embeddings.py. Much faster
+         and smaller on CPU-only hosts.
+
+Both apply the model's mean pooling and return float32 arrays, so vectors
+from either backend can share one index once parity has been checked. The
+onnx backend refuses to load an export without a passing parity record.
+"""
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional, Union
+import numpy as np
+from src.config import settings
+from src.core.exceptions import EmbeddingModelException
+from src.utils.hashing import sha256_file
+
+# File name of the quantized model inside ONNX_EMBEDDING_MODEL_DIR
+ONNX_MODEL_FILE = "model_int8.onnx"
+# Result of the last `scripts/onnx_embeddings.py check`, next to the model
+ONNX_PARITY_FILE = "parity.json"
+
+
+def verify_onnx_parity(model_path: Path) -> dict:
+    """
+    Return the parity record of an ONNX export, raising EmbeddingModelException
+    when it is missing, failed, or was measured on a different model file.
+    """
+    parity_path = model_path.parent / ONNX_PARITY_FILE
+    try:
+        record = json.loads(parity_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise EmbeddingModelException(
+            f"No parity check recorded for {model_path}; run scripts/onnx_embeddings.py check first"
+        )
+    except (OSError, ValueError) as e:
+        raise EmbeddingModelException(f"Unreadable ONNX parity record {parity_path}: {e}")
+    if record.get("model_sha256") != sha256_file(model_path):
+        raise EmbeddingModelException(
+            f"Parity record {parity_path} was measured on a different export; "
+            f"rerun scripts/onnx_embeddings.py check"
+        )
+    if not record.get("passed"):
+        raise EmbeddingModelException(
+            f"ONNX export {model_path} failed its last parity check "
+            f"(min cosine {record.get('min_cosine')} < {record.get('min_cosine_threshold')})"
+        )
+    return record
+
+
+class EmbeddingBackend(ABC):
+    """Encodes texts into embedding vectors."""
+
+    name: str = ""
+
+    @abstractmethod
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, normalize_embeddings: bool = False,
+               **kwargs) -> np.ndarray:
+        """Return one row per sentence (a single vector for a str input)."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, normalize_embeddings=False, **kwargs):
+        return self.model.encode(
+            sentences,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            normalize_embeddings=normalize_embeddings,
+            convert_to_numpy=True,
+        )
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    ONNX Runtime session over an exported transformer encoder. Token embeddings
+    are mean-pooled over the attention mask, matching the e5 pooling layer.
+
+    `require_parity` is only disabled by the parity check itself.
+    """
+    name = "onnx"
+
+    def __init__(self, model_dir: str = settings.ONNX_EMBEDDING_MODEL_DIR,
+                 model_file: str = ONNX_MODEL_FILE, max_length: int = 512,
+                 intra_op_threads: Optional[int] = settings.ONNX_INTRA_OP_THREADS,
+                 require_parity: bool = True):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = Path(model_dir) / model_file
+        if not path.exists():
+            raise EmbeddingModelException(
+                f"ONNX embedding model not found at {path}; "
+                f"run scripts/onnx_embeddings.py export first"
+            )
+        self.parity = verify_onnx_parity(path) if require_parity else None
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feeds = {name: tokens[name].astype(np.int64) for name in tokens if name in self._input_names}
+        hidden = self.session.run(None, feeds)[0]
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, settings.EMBEDDING_DIMENSION), dtype=np.float32)
+        batch_size = max(1, batch_size)
+        # Sort by length so each batch pads to similar lengths, then restore input order
+        order = np.argsort([-len(text) for text in texts])
+        parts = []
+        for start in range(0, len(texts), batch_size):
+            batch_idx = order[start:start + batch_size]
+            parts.append(self._encode_batch([texts[i] for i in batch_idx]))
+        embeddings = np.concatenate(parts).astype(np.float32)
+        result = np.empty_like(embeddings)
+        result[order] = embeddings
+        if normalize_embeddings:
+            result /= np.clip(np.linalg.norm(result, axis=1, keepdims=True), 1e-12, None)
+        return result[0] if single else result
+
+
+def get_embedding_backend(backend: str = settings.EMBEDDING_BACKEND) -> EmbeddingBackend:
+    """Create the embedding backend selected by EMBEDDING_BACKEND ('torch' or 'onnx')."""
+    backend = backend.lower()
+    if backend == "torch":
+        return SentenceTransformerBackend()
+    if backend == "onnx":
+        return OnnxEmbeddingBackend()
+    raise EmbeddingModelException(f"Unknown EMBEDDING_BACKEND: {backend}")
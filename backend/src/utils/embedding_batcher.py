@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, List, Tuple
+
+# Upper bounds of the batch-size histogram buckets (last bucket is open-ended)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class BatchingEmbedder:
+    """
+    Dynamic micro-batcher in front of a SentenceTransformer model.
+
+    Concurrent callers submit single query texts. A collector thread waits up to
+    `max_wait_ms` (or until `max_batch_size` texts are queued), encodes the whole
+    batch in one `encode` call on `executor`, and resolves each caller's future
+    with its own vector.
+    """
+
+    def __init__(self, model, executor: Executor, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self._model = model
+        self._executor = executor
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._collector = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._histogram_overflow = 0
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for encoding and return a future resolving to its normalized vector."""
+        self._ensure_collector()
+        future: Future = Future()
+        self._queue.put((text, future))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and batch-size histogram counters."""
+        with self._stats_lock:
+            histogram = {f"le_{bucket}": count for bucket, count in self._histogram.items()}
+            histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self._histogram_overflow
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": histogram,
+                "max_batch_size": self._max_batch_size,
+                "max_wait_ms": self._max_wait * 1000.0,
+            }
+
+    def _ensure_collector(self):
+        if self._collector is not None:
+            return
+        with self._start_lock:
+            if self._collector is None:
+                self._collector = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._collector.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Drain anything that arrived while waiting, up to the batch cap
+            while len(batch) < self._max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._record_batch(len(batch))
+            self._executor.submit(self._encode_batch, batch)
+
+    def _record_batch(self, size: int):
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self._histogram[bucket] += 1
+                    break
+            else:
+                self._histogram_overflow += 1
+
+    def _encode_batch(self, batch: List[Tuple[str, Future]]):
+        # Mark futures running so a disconnecting caller can no longer cancel them
+        # between here and set_result; drop those already cancelled
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = self._model.encode(
+                texts,
+                normalize_embeddings=True,
+                batch_size=len(texts),
+                show_progress_bar=False,
+            )
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding.tolist() if hasattr(embedding, "tolist") else list(embedding))
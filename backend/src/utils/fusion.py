@@ -0,0 +1,14 @@
+from typing import Dict, Hashable, Iterable, List
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[Hashable]], k: int = 60) -> Dict[Hashable, float]:
+    """
+    Fuse several best-first rankings with reciprocal rank fusion: each item
+    scores sum(1 / (k + rank)) over the rankings it appears in (rank from 1).
+    Only ranks matter, so scores on different scales (cosine, BM25) combine safely.
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return fused
@@ -0,0 +1,27 @@
+import hashlib
+
+_READ_BLOCK_SIZE = 1024 * 1024
+
+
+def sha256_file(path) -> str:
+    """Hex SHA-256 of a file's content, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """Hex SHA-256 of a UTF-8 string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, page_number, chunk_text: str) -> str:
+    """
+    Deterministic vector id for a chunk, where `source` is the content hash of its file.
+    The same text on the same page of the same file content always maps to the same id,
+    so re-ingesting a document overwrites instead of duplicating its vectors, while a
+    different document uploaded under the same filename gets ids of its own.
+    """
+    return text_hash(f"{source}\x00{page_number}\x00{chunk_text}")
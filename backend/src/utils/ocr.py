@@ -0,0 +1,93 @@
+"""
+OCR for image-only PDF pages.
+
+Pages are rasterized straight from the open PyMuPDF document, and the
+grayscale images are handed to a small thread pool, each thread driving its
+own tesseract process. Text is cached on disk by image hash so re-uploads
+never OCR the same page twice.
+"""
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import fitz  # PyMuPDF
+from src.config import settings
+
+
+class OcrCache:
+    """Directory of OCR results named by the SHA-256 of the page image."""
+
+    def __init__(self, root: str = settings.OCR_CACHE_DIR):
+        self.root = Path(root)
+
+    def _path(self, image_hash: str) -> Path:
+        return self.root / image_hash[:2] / f"{image_hash}.txt"
+
+    def get(self, image_hash: str) -> Optional[str]:
+        try:
+            return self._path(image_hash).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def set(self, image_hash: str, text: str):
+        path = self._path(image_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent loader processes never read partial files
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def render_page(page: "fitz.Page", dpi: int = settings.OCR_DPI) -> Tuple[str, "fitz.Pixmap"]:
+    """Rasterize a page to a grayscale pixmap and return (image hash, pixmap)."""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    digest = hashlib.sha256()
+    digest.update(f"{pix.width}x{pix.height}x{pix.n}:{settings.OCR_LANG}:".encode())
+    digest.update(pix.samples)
+    return digest.hexdigest(), pix
+
+
+def _tesseract(width: int, height: int, samples: bytes) -> str:
+    import pytesseract
+    from PIL import Image
+
+    image = Image.frombytes("L", (width, height), samples)
+    return pytesseract.image_to_string(image, lang=settings.OCR_LANG).strip()
+
+
+def ocr_pages(doc: "fitz.Document", page_indexes: List[int],
+              max_workers: int = settings.OCR_WORKERS, cache: Optional[OcrCache] = None) -> Dict[int, str]:
+    """
+    OCR the given pages of an open document and return {page_index: text}.
+    Cached pages are served from `cache`; the rest are rendered one by one and
+    submitted to the tesseract pool, with at most two images per worker held
+    in memory at a time.
+    """
+    cache = cache or OcrCache()
+    results: Dict[int, str] = {}
+    max_workers = max(1, max_workers)
+    in_flight = deque()
+
+    def collect_oldest():
+        page_idx, image_hash, future = in_flight.popleft()
+        text = future.result()
+        cache.set(image_hash, text)
+        results[page_idx] = text
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tesseract") as pool:
+        for page_idx in page_indexes:
+            # Rendering stays on this thread: PyMuPDF documents are not thread-safe
+            image_hash, pix = render_page(doc[page_idx])
+            cached = cache.get(image_hash)
+            if cached is not None:
+                results[page_idx] = cached
+                continue
+            future = pool.submit(_tesseract, pix.width, pix.height, pix.samples)
+            in_flight.append((page_idx, image_hash, future))
+            if len(in_flight) >= max_workers * 2:
+                collect_oldest()
+        while in_flight:
+            collect_oldest()
+    return results
@@ -0,0 +1,167 @@
+"""
+PDF text extraction that can run in worker processes.
+
+Kept free of heavy imports (embedding model, vector store clients) because
+spawned workers import this module on start-up.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import fitz  # PyMuPDF
+from src.config import settings
+from src.utils.ocr import ocr_pages
+from src.core.metrics import PAGES, observe_stage
+
+
+def extract_pdf_pages(file_path: str, first_page: int = 0, last_page: Optional[int] = None,
+                      timings: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Extract the non-empty pages [first_page, last_page) of one PDF,
+    with OCR fallback for image-only pages. If `timings` is given, the OCR
+    time and page count are added to it as 'ocr_seconds' and 'ocr_pages'.
+    """
+    file = Path(file_path)
+    pages = []
+    with fitz.open(file) as doc:
+        stop = doc.page_count if last_page is None else min(last_page, doc.page_count)
+        texts = {page_idx: doc[page_idx].get_text("text").strip() for page_idx in range(first_page, stop)}
+        # OCR fallback for image-only pages, rendered from the already open document
+        image_only = [page_idx for page_idx, text in texts.items() if not text]
+        if image_only:
+            ocr_started = time.perf_counter()
+            texts.update(ocr_pages(doc, image_only))
+            if timings is not None:
+                timings["ocr_seconds"] = timings.get("ocr_seconds", 0.0) + time.perf_counter() - ocr_started
+                timings["ocr_pages"] = timings.get("ocr_pages", 0) + len(image_only)
+        for page_idx, text in texts.items():
+            if not text:
+                continue
+            pages.append({
+                "page_content": text,
+                "filename": file.name,
+                "page_number": page_idx + 1,
+                "file_path": str(file)
+            })
+    return pages
+
+
+def _run_task(task: Tuple[str, int, Optional[int]]) -> Dict[str, Any]:
+    """
+    Worker entry point. Errors are returned as text so results always pickle,
+    and timings are returned for the parent to record, since metrics
+    observed in a worker process never reach /metrics.
+    """
+    file_path, first_page, last_page = task
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    try:
+        pages = extract_pdf_pages(file_path, first_page, last_page, timings)
+        error = None
+    except Exception as e:
+        pages = []
+        error = f"{type(e).__name__}: {e}"
+    return {"pages": pages, "seconds": time.perf_counter() - started, "error": error, **timings}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all loads. Spawned, since the server process runs threads."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+class ParallelPdfLoader:
+    """
+    Extracts many PDFs across a process pool.
+
+    Files with more than `pages_per_task` pages are split into page ranges so a
+    single large document is spread across workers too. Files are yielded in
+    input order, each only once all of its ranges are done. Per-file timing and
+    failures are collected in `report`.
+    """
+
+    def __init__(self, max_workers: int = settings.PDF_LOADER_WORKERS,
+                 pages_per_task: int = settings.PDF_PAGES_PER_TASK):
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.report: List[Dict[str, Any]] = []
+
+    def _tasks(self, file: Path) -> List[Tuple[str, int, Optional[int]]]:
+        try:
+            with fitz.open(file) as doc:
+                page_count = doc.page_count
+        except Exception:
+            # Let the worker raise the real error for this file
+            return [(str(file), 0, None)]
+        if page_count <= self.pages_per_task:
+            return [(str(file), 0, None)]
+        return [
+            (str(file), start, start + self.pages_per_task)
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+
+    def iter_files(self, files: Iterable[Path]) -> Iterator[Tuple[Path, List[Dict[str, Any]], Optional[str]]]:
+        """Yield (file, pages, error) per file in input order; `error` is None on success."""
+        files = list(files)
+        self.report = []
+        if self.max_workers == 1:
+            for file in files:
+                started = time.perf_counter()
+                results = [_run_task(task) for task in self._tasks(file)]
+                yield self._finish(file, results, time.perf_counter() - started)
+            return
+
+        pool = _get_pool(self.max_workers)
+        window = self.max_workers * 2
+        pending = deque()  # (file, started, futures), in input order
+        file_iter = iter(files)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and sum(len(futures) for _, _, futures in pending) < window:
+                file = next(file_iter, None)
+                if file is None:
+                    exhausted = True
+                    break
+                futures = [pool.submit(_run_task, task) for task in self._tasks(file)]
+                pending.append((file, time.perf_counter(), futures))
+            if not pending:
+                break
+            file, started, futures = pending.popleft()
+            results = [future.result() for future in futures]
+            yield self._finish(file, results, time.perf_counter() - started)
+
+    def _finish(self, file: Path, results: List[Dict[str, Any]], wall_seconds: float):
+        for result in results:
+            observe_stage("pdf_load", result["seconds"])
+            if result.get("ocr_pages"):
+                observe_stage("ocr", result["ocr_seconds"])
+                PAGES.labels("ocr").inc(result["ocr_pages"])
+        errors = [result["error"] for result in results if result["error"]]
+        error = "; ".join(errors) if errors else None
+        pages = [] if error else [page for result in results for page in result["pages"]]
+        PAGES.labels("pdf").inc(len(pages))
+        self.report.append({
+            "filename": file.name,
+            "pages": len(pages),
+            "tasks": len(results),
+            "cpu_seconds": round(sum(result["seconds"] for result in results), 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "error": error,
+        })
+        return file, pages, error
+
+    def slowest(self, n: int = 5) -> List[Dict[str, Any]]:
+        return sorted(self.report, key=lambda entry: entry["cpu_seconds"], reverse=True)[:n]
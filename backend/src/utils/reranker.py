@@ -0,0 +1,171 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from src.config import settings
+from src.utils.cache import LRUTTLCache
+from src.core.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class CrossEncoderReranker:
+    """
+    Reorders retrieved chunks with a small cross-encoder run on CPU.
+
+    Uncached (query, chunk) pairs are scored in one batched forward pass.
+    Scores are cached by normalized query and chunk id; chunk ids are content
+    hashes, so a score never goes stale. Each call has a latency budget: the
+    number of pairs scored is capped by the measured per-pair cost, and if the
+    forward pass still overruns, the retrieval order is returned instead (the
+    late scores are cached for the next call). Only one forward pass is queued
+    or running at a time; calls arriving meanwhile keep the retrieval order
+    rather than piling up behind it.
+    """
+
+    def __init__(self, model_name: str = settings.RERANK_MODEL,
+                 budget_ms: float = settings.RERANK_LATENCY_BUDGET_MS,
+                 batch_size: int = settings.RERANK_BATCH_SIZE,
+                 cache_size: int = settings.RERANK_CACHE_MAX_SIZE):
+        self._model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._budget = max(1.0, budget_ms) / 1000.0
+        self._batch_size = max(1, batch_size)
+        # One forward pass at a time; torch already uses all cores within a pass
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._pending: Optional[Future] = None
+        self._scores = LRUTTLCache(cache_size, ttl_seconds=0, name="rerank_score")
+        self._stats_lock = threading.Lock()
+        self._seconds_per_pair: Optional[float] = None
+        self.calls = 0
+        self.pairs_scored = 0
+        self.pairs_skipped = 0
+        self.timeouts = 0
+        self.busy_skips = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info("Loading reranker model %s", self._model_name)
+                    self._model = CrossEncoder(self._model_name, device="cpu")
+        return self._model
+
+    def _predict(self, query: str, texts: List[str]) -> List[float]:
+        started = time.perf_counter()
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self._batch_size)
+        per_pair = (time.perf_counter() - started) / len(texts)
+        with self._stats_lock:
+            # Exponential moving average of the cost of one pair
+            if self._seconds_per_pair is None:
+                self._seconds_per_pair = per_pair
+            else:
+                self._seconds_per_pair = 0.8 * self._seconds_per_pair + 0.2 * per_pair
+        return [float(score) for score in scores]
+
+    def _score_and_cache(self, query_key: str, query: str, docs: List[Document]) -> List[float]:
+        scores = self._predict(query, [doc.page_content for doc in docs])
+        for doc, score in zip(docs, scores):
+            self._scores.set((query_key, doc.metadata.get("id", "")), score)
+        return scores
+
+    def rerank(self, query: str, query_key: str, docs: List[Document], top_k: int) -> Tuple[List[Document], bool]:
+        """
+        Return the `top_k` best of `docs` by cross-encoder score, and whether
+        every candidate was scored. Reranked documents get 'rerank_score' and a
+        0-1 'relevance' metadata entry; documents left unscored (budget cap,
+        timeout or a pass already in flight) keep their order after them.
+        Incomplete results should not be cached by the caller.
+        """
+        with stage("rerank"):
+            return self._rerank(query, query_key, docs, top_k)
+
+    def _submit(self, query_key: str, query: str, docs: List[Document]) -> Optional[Future]:
+        """Start a forward pass unless one is already queued or running."""
+        with self._stats_lock:
+            if self._pending is not None and not self._pending.done():
+                self.busy_skips += 1
+                return None
+            self._pending = self._executor.submit(self._score_and_cache, query_key, query, docs)
+            return self._pending
+
+    def _rerank(self, query: str, query_key: str, docs: List[Document], top_k: int) -> Tuple[List[Document], bool]:
+        if not docs:
+            return docs, True
+        scores: Dict[int, float] = {}
+        uncached = []
+        for i, doc in enumerate(docs):
+            score = self._scores.get((query_key, doc.metadata.get("id", "")))
+            if score is None:
+                uncached.append(i)
+            else:
+                scores[i] = score
+
+        with self._stats_lock:
+            per_pair = self._seconds_per_pair
+            self.calls += 1
+        if per_pair is not None:
+            # Keep the expected cost within budget, best retrieved candidates first
+            affordable = max(1, int(self._budget / max(per_pair, 1e-6)))
+            with self._stats_lock:
+                self.pairs_skipped += max(0, len(uncached) - affordable)
+            uncached = uncached[:affordable]
+
+        if uncached:
+            future = self._submit(query_key, query, [docs[i] for i in uncached])
+            if future is None:
+                logger.debug("Reranker busy; keeping retrieval order")
+                return docs[:top_k], False
+            try:
+                # The first call also loads the model, so it is not held to the budget
+                new_scores = future.result(timeout=self._budget if per_pair is not None else None)
+            except FutureTimeoutError:
+                # Cancel if still queued; a running pass finishes and caches its scores
+                future.cancel()
+                with self._stats_lock:
+                    self.timeouts += 1
+                logger.warning("Reranking exceeded %.0f ms; keeping retrieval order", self._budget * 1000)
+                return docs[:top_k], False
+            scores.update(zip(uncached, new_scores))
+            with self._stats_lock:
+                self.pairs_scored += len(uncached)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        unscored = [i for i in range(len(docs)) if i not in scores]
+        result = []
+        for i in ranked:
+            doc = docs[i]
+            doc.metadata["rerank_score"] = scores[i]
+            doc.metadata["relevance"] = _sigmoid(scores[i])
+            result.append(doc)
+        floor = min((doc.metadata["relevance"] for doc in result), default=1.0)
+        for i in unscored:
+            doc = docs[i]
+            doc.metadata["relevance"] = min(doc.metadata.get("relevance", doc.metadata.get("score", 0.0)), floor)
+            result.append(doc)
+        return result[:top_k], not unscored
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "model": self._model_name,
+                "latency_budget_ms": self._budget * 1000,
+                "ms_per_pair": round(self._seconds_per_pair * 1000, 3) if self._seconds_per_pair else None,
+                "calls": self.calls,
+                "pairs_scored": self.pairs_scored,
+                "pairs_skipped": self.pairs_skipped,
+                "timeouts": self.timeouts,
+                "busy_skips": self.busy_skips,
+                "score_cache": self._scores.stats(),
+            }
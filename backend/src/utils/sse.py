@@ -0,0 +1,23 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+from fastapi.responses import StreamingResponse
+
+# Disable proxy buffering so events reach the client as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> StreamingResponse:
+    """Wrap an async iterator of (event, data) pairs in a text/event-stream response."""
+    async def body():
+        async for event, data in events:
+            yield format_sse(event, data)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,57 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _StageError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def background_iter(iterable: Iterable[T], maxsize: int = 4, name: str = "pipeline-stage") -> Iterator[T]:
+    """
+    Run `iterable` in a background thread and yield its items through a bounded queue.
+
+    Chaining several of these turns a chain of generators into overlapping pipeline
+    stages: each stage works ahead of its consumer by at most `maxsize` items, so
+    memory stays bounded. Exceptions raised by the producer are re-raised in the
+    consumer; closing the consumer early stops the producer.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+            return
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
@@ -1,27 +1,40 @@
-from src.schemas.response import DocumentProcessSuccessResponse
-from src.schemas.response import QuerySuccessResponse, QueryNotFoundResponse
+from fastapi.responses import StreamingResponse
+from src.schemas.response import IngestionJobResponse
+from src.schemas.response import QuerySuccessResponse, QueryNotFoundResponse, BatchQueryResponse
+
+_job_example = {
+    "statusCode": 200,
+    "success": True,
+    "job_id": "3f2b9c1e8d7a4b6c9e0f1a2b3c4d5e6f",
+    "status": "running",
+    "filenames": ["contract.pdf"],
+    "replace": False,
+    "progress": {"pages_loaded": 42, "chunks": 180, "vectors_stored": 100},
+    "created_at": "2025-01-01T10:00:00+00:00",
+    "started_at": "2025-01-01T10:00:01+00:00",
+    "finished_at": None,
+    "result": None,
+    "error": None
+}
 
 uploadendpoint = {
-	"summary": "Upload and process documents",
-	"description": "Upload one or more files. The files will be processed, embedded, and stored in Pinecone. Returns processing metadata.",
-	"response_model": DocumentProcessSuccessResponse,
+	"summary": "Upload documents for background processing",
+	"description": "Upload one or more files. They are queued as an ingestion job that embeds and stores them in the vector store. Returns the job id immediately; poll GET /jobs/{job_id} for progress. A file whose content is already indexed is skipped; a different file under an existing filename is stored alongside it unless the form field replace=true, which deletes the earlier document's chunks.",
+	"response_model": IngestionJobResponse,
+	"status_code": 202,
 	"responses": {
-		200: {
-			"description": "Documents processed and stored successfully",
+		202: {
+			"description": "Ingestion job queued",
 			"content": {
 				"application/json": {
-					"example": {
-                        "statusCode": 200,
-						"success": True,
-						"message": "Documents processed and stored successfully",
-						"documents_processed": 2,
-						"vectors_stored": 10
-					}
+					"example": {**_job_example, "statusCode": 202, "status": "queued",
+                                "progress": {"pages_loaded": 0, "chunks": 0, "vectors_stored": 0},
+                                "started_at": None}
 				}
 			}
 		},
 		500: {
-			"description": "Error during document processing",
+			"description": "Error while saving the uploaded files",
 			"content": {
 				"application/json": {
 					"example": {
@@ -36,6 +49,31 @@ uploadendpoint = {
 }
 
 
+jobendpoint = {
+    "summary": "Get ingestion job status",
+    "description": "Return the status (queued, running, completed, failed), per-stage progress counters and, once finished, the processing result of an ingestion job.",
+    "response_model": IngestionJobResponse,
+    "responses": {
+        200: {
+            "description": "Job status",
+            "content": {"application/json": {"example": _job_example}}
+        },
+        404: {
+            "description": "Unknown job id",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "statusCode": 404,
+                        "statusMessage": "Not Found",
+                        "errorMessage": "Ingestion job not found: 3f2b9c1e8d7a4b6c9e0f1a2b3c4d5e6f"
+                    }
+                }
+            }
+        }
+    }
+}
+
+
 queryendpoint = {
     "summary": "Ask a question to the RAG chatbot",
     "description": "Submit a query to get an answer based on the processed documents. You can optionally filter the search to a specific filename.",
@@ -47,7 +85,8 @@ queryendpoint = {
                     "example": {
                         "query": "What services does Lomaa IT Solutions provide?",
                         "top_k": 3, # Optional, default is 5
-                        "min_score": 0.5 # Optional, default is 0.5
+                        "min_score": 0.5, # Optional, default is 0.5
+                        "use_cache": True # Optional, set False to bypass the answer cache
                     }
                 }
             }
@@ -113,3 +152,129 @@ queryendpoint = {
     }
 }
 
+
+
+querybatchendpoint = {
+    "summary": "Ask many questions in one request",
+    "description": (
+        "Answer a list of /query requests. All questions are embedded in one batch, "
+        "retrievals run concurrently and LLM calls are concurrency-limited. Results "
+        "are returned in request order; each carries its own statusCode, so a failed "
+        "question does not fail the batch."
+    ),
+    "response_model": BatchQueryResponse,
+    "openapi_extra": {
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "example": {
+                        "queries": [
+                            {"query": "What are the key terms in the contract?", "top_k": 3},
+                            {"query": "What is the company's policy on space travel?"}
+                        ]
+                    }
+                }
+            }
+        }
+    },
+    "responses": {
+        200: {
+            "description": "Per-question results in request order",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "statusCode": 200,
+                        "success": True,
+                        "count": 2,
+                        "succeeded": 1,
+                        "results": [
+                            {
+                                "statusCode": 200,
+                                "success": True,
+                                "message": "Answer retrieved successfully",
+                                "query": "What are the key terms in the contract?",
+                                "answer": "The key terms include the payment schedule and termination clauses.",
+                                "sources": ["contract.pdf"]
+                            },
+                            {
+                                "statusCode": 404,
+                                "success": False,
+                                "message": "Information not found",
+                                "query": "What is the company's policy on space travel?",
+                                "answer": "I could not find any relevant information to answer that question in the provided documents."
+                            }
+                        ]
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Too many questions in one batch",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": {
+                            "statusCode": 400,
+                            "statusMessage": "Bad Request",
+                            "errorMessage": "Batch of 5000 queries exceeds the maximum of 1000"
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+querystreamendpoint = {
+    "summary": "Query the RAG system with a streamed answer",
+    "description": (
+        "Same input as /query, answered as a text/event-stream. Events: 'sources' "
+        "(source filenames, source_url, cached) once retrieval is done, 'token' for each "
+        "piece of the answer as the LLM generates it, and a closing 'done'. "
+        "Failures end the stream with an 'error' event."
+    ),
+    "response_class": StreamingResponse,
+    "responses": {
+        200: {
+            "description": "Server-sent event stream",
+            "content": {
+                "text/event-stream": {
+                    "example": (
+                        'event: sources\ndata: {"query": "What are the key terms in the contract?", '
+                        '"sources": ["contract.pdf"], "source_url": null, "cached": false}\n\n'
+                        'event: token\ndata: {"text": "The key"}\n\n'
+                        'event: token\ndata: {"text": " terms include"}\n\n'
+                        'event: done\ndata: {"statusCode": 200, "success": true, '
+                        '"message": "Answer retrieved successfully"}\n\n'
+                    )
+                }
+            }
+        }
+    }
+}
+
+
+summarizestreamendpoint = {
+    "summary": "Summarize a document with a streamed summary",
+    "description": (
+        "Same input as /summarize, answered as a text/event-stream. Events: 'metadata' "
+        "(filename, word_count), 'token' for each piece of the summary, and a closing 'done'. "
+        "Long documents are map-reduced before the first token is sent."
+    ),
+    "response_class": StreamingResponse,
+    "responses": {
+        200: {
+            "description": "Server-sent event stream",
+            "content": {
+                "text/event-stream": {
+                    "example": (
+                        'event: metadata\ndata: {"filename": "report.pdf", "word_count": 5230}\n\n'
+                        'event: token\ndata: {"text": "The report"}\n\n'
+                        'event: done\ndata: {"success": true}\n\n'
+                    )
+                }
+            }
+        }
+    }
+}
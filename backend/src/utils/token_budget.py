@@ -0,0 +1,117 @@
+"""
+Token counting and budgeting for LLM prompts.
+
+Counts come from a Hugging Face tokenizer (TOKENIZER_NAME) loaded on first
+use. If it cannot be loaded (no `transformers`, offline without a cached
+copy), a conservative characters-per-token estimate is used instead so
+prompts are still bounded.
+"""
+import logging
+import math
+import threading
+from typing import Callable, List, Optional, Sequence, TypeVar
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Fallback estimate; English prose averages ~4.2 characters per Llama 3 token,
+# 3.5 overestimates counts by about a fifth, so estimated prompts stay within budget
+_CHARS_PER_TOKEN = 3.5
+# Headroom for chat formatting tokens and tokenizer mismatch with the served model
+SAFETY_MARGIN_TOKENS = 64
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
+
+
+def _get_tokenizer():
+    global _tokenizer, _tokenizer_loaded
+    if _tokenizer_loaded:
+        return _tokenizer
+    with _tokenizer_lock:
+        if not _tokenizer_loaded:
+            try:
+                from transformers import AutoTokenizer
+
+                _tokenizer = AutoTokenizer.from_pretrained(settings.TOKENIZER_NAME)
+            except Exception as e:
+                logger.warning("Tokenizer %r unavailable, estimating token counts: %s", settings.TOKENIZER_NAME, e)
+                _tokenizer = None
+            _tokenizer_loaded = True
+    return _tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text` (estimated when no tokenizer is available)."""
+    if not text:
+        return 0
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return text[:int(max_tokens * _CHARS_PER_TOKEN)]
+    ids = tokenizer.encode(text, add_special_tokens=False)
+    if len(ids) <= max_tokens:
+        return text
+    return tokenizer.decode(ids[:max_tokens])
+
+
+def split_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    Split `text` into pieces of at most `max_tokens` tokens, breaking on
+    paragraph boundaries first, then lines, sentences and words.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        separators=["\n\n", "\n", ". ", " ", ""],
+        chunk_size=max(1, max_tokens),
+        chunk_overlap=0,
+        length_function=count_tokens,
+        keep_separator="end",
+    )
+    return splitter.split_text(text)
+
+
+def prompt_budget(prompt_overhead: str, max_completion_tokens: int,
+                  context_window: int = settings.LLM_CONTEXT_WINDOW) -> int:
+    """
+    Tokens left for variable content in a prompt, given the fixed part of the
+    prompt (`prompt_overhead`) and the tokens reserved for the completion.
+    """
+    return max(0, context_window - max_completion_tokens - count_tokens(prompt_overhead) - SAFETY_MARGIN_TOKENS)
+
+
+def pack_by_relevance(items: Sequence[T], render: Callable[[T], str], budget: int,
+                      score: Optional[Callable[[T], float]] = None,
+                      separator: str = "") -> List[str]:
+    """
+    Greedily fill `budget` tokens with rendered items, most relevant first.
+    Items that do not fit are skipped so smaller, less relevant ones can still
+    be used. If not even the most relevant item fits, it is truncated to the
+    budget rather than sending no context at all.
+    """
+    if score is not None:
+        items = sorted(items, key=score, reverse=True)
+    rendered = [render(item) for item in items]
+    separator_tokens = count_tokens(separator)
+    packed: List[str] = []
+    used = 0
+    for text in rendered:
+        cost = count_tokens(text) + (separator_tokens if packed else 0)
+        if used + cost <= budget:
+            packed.append(text)
+            used += cost
+    if not packed and rendered and budget > 0:
+        packed.append(truncate_to_tokens(rendered[0], budget))
+    return packed
@@ -0,0 +1,64 @@
+"""
+Size-bounded handling of uploaded files.
+
+Uploads are copied in UPLOAD_CHUNK_BYTES pieces, so memory per request stays
+at one chunk regardless of file size, and limits are enforced while copying
+rather than after a whole file has been read.
+"""
+from pathlib import Path
+from typing import BinaryIO, Optional
+from src.config import settings
+from src.core.exceptions import DocumentProcessingException, UploadTooLargeException
+
+
+def _mib(size: int) -> str:
+    return f"{size / (1024 * 1024):.0f} MiB"
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Base name of an uploaded file, so a crafted name cannot escape the target folder."""
+    name = Path(filename or "").name
+    if name in ("", ".", ".."):
+        raise DocumentProcessingException(f"Invalid upload filename: {filename!r}")
+    return name
+
+
+def spool_to_file(source: BinaryIO, path: Path, max_bytes: int = settings.UPLOAD_MAX_FILE_BYTES,
+                  chunk_size: int = settings.UPLOAD_CHUNK_BYTES) -> int:
+    """
+    Copy `source` to `path` chunk by chunk and return the bytes written.
+    Raises UploadTooLargeException (removing the partial file) once more
+    than `max_bytes` have been read.
+    """
+    written = 0
+    try:
+        with open(path, "wb") as f:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLargeException(f"{path.name} exceeds the {_mib(max_bytes)} per-file limit")
+                f.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return written
+
+
+def read_bounded(source: BinaryIO, max_bytes: int, name: str = "upload",
+                 chunk_size: int = settings.UPLOAD_CHUNK_BYTES) -> bytearray:
+    """
+    Read `source` into memory, failing as soon as it exceeds `max_bytes`.
+    Returns the buffer itself (no final copy); fitz and decode accept it as is.
+    """
+    buffer = bytearray()
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if len(buffer) + len(chunk) > max_bytes:
+            raise UploadTooLargeException(f"{name} exceeds the {_mib(max_bytes)} per-file limit")
+        buffer += chunk
+    return buffer